@@ -135,9 +135,10 @@ export const getFeedbackHistory = async () => {
   }
 };
 
-export const getAdminFeedback = async () => {
+// Returns one page (newest first) as { results, next_cursor }; params: unreplied, cursor, page_size
+export const getAdminFeedback = async (params = {}) => {
   try {
-    const response = await axiosInstance.get('operations/admin-feedback/');
+    const response = await axiosInstance.get('operations/admin-feedback/', { params });
     return response.data;
   } catch (error) {
     throw error.response?.data || { error: "Failed to load admin feedback" };
@@ -205,18 +206,20 @@ export const getStaffLeaveHistory = async () => {
  * --- ADMIN LEAVE ACTIONS ---
  */
 
-export const getAdminStudentLeaves = async () => {
+// Returns one page (newest first) as { results, next_cursor }; params: status, date_from, date_to, cursor, page_size
+export const getAdminStudentLeaves = async (params = {}) => {
   try {
-    const response = await axiosInstance.get('operations/admin/student-leaves/');
+    const response = await axiosInstance.get('operations/admin/student-leaves/', { params });
     return response.data;
   } catch (error) {
     throw error.response?.data || { error: "Failed to fetch student leave list" };
   }
 };
 
-export const getAdminStaffLeaves = async () => {
+// Returns one page (newest first) as { results, next_cursor }; params: status, date_from, date_to, cursor, page_size
+export const getAdminStaffLeaves = async (params = {}) => {
   try {
-    const response = await axiosInstance.get('operations/admin/staff-leaves/');
+    const response = await axiosInstance.get('operations/admin/staff-leaves/', { params });
     return response.data;
   } catch (error) {
     throw error.response?.data || { error: "Failed to fetch staff leave list" };
@@ -234,4 +237,24 @@ export const updateLeaveStatus = async (leaveId, type, status) => {
   } catch (error) {
     throw error.response?.data || { error: "Failed to update leave status" };
   }
-};
\ No newline at end of file
+};
+
+// Pending and approved leaves overlapping start..end (inclusive); type: 'staff' | 'student' | omitted for both
+export const getLeaveOverlaps = async (start, end, type) => {
+  try {
+    const response = await axiosInstance.get('operations/leave/overlaps/', { params: { start, end, type } });
+    return response.data;
+  } catch (error) {
+    throw error.response?.data || { error: "Failed to fetch overlapping leaves" };
+  }
+};
+
+// Per-day list of who is on leave; month: 'YYYY-MM', type: 'staff' (default) | 'student'
+export const getLeaveCalendar = async (month, type = 'staff') => {
+  try {
+    const response = await axiosInstance.get('operations/leave/calendar/', { params: { month, type } });
+    return response.data;
+  } catch (error) {
+    throw error.response?.data || { error: "Failed to fetch leave calendar" };
+  }
+};
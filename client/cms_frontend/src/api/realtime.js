@@ -0,0 +1,41 @@
+/**
+ * Live updates pushed by the server over /ws/events/.
+ * Events look like { type: 'leave.updated' | 'leave.created' | 'feedback.created' | 'feedback.replied'
+ *   | 'attendance.updated' | 'attendance.saved' | 'notification.created' | 'notification.read', data }.
+ * A large broadcast arrives as notification.created with data { refetch: true } on the whole role.
+ * Returns an unsubscribe function. The socket reconnects with backoff while subscribed.
+ */
+import axiosInstance from './axiosInstance';
+
+// Same host as the REST API, so pointing axiosInstance at production moves the socket with it
+const apiUrl = new URL(axiosInstance.defaults.baseURL, window.location.href);
+const WS_URL = `${apiUrl.protocol === 'https:' ? 'wss:' : 'ws:'}//${apiUrl.host}/ws/events/`;
+
+export const subscribeToEvents = (onEvent) => {
+  let socket;
+  let retry = 1000;
+  let closed = false;
+
+  const connect = () => {
+    const token = localStorage.getItem('access_token');
+    if (!token || closed) return;
+    socket = new WebSocket(`${WS_URL}?token=${encodeURIComponent(token)}`);
+    socket.onopen = () => { retry = 1000; };
+    socket.onmessage = (message) => {
+      const event = JSON.parse(message.data);
+      if (event.type !== 'pong') onEvent(event);
+    };
+    socket.onclose = (e) => {
+      // 4401: token missing or expired; wait for the next subscribe after login/refresh
+      if (closed || e.code === 4401) return;
+      setTimeout(connect, retry);
+      retry = Math.min(retry * 2, 30000);
+    };
+  };
+
+  connect();
+  return () => {
+    closed = true;
+    if (socket) socket.close();
+  };
+};
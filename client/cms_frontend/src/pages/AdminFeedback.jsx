@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { getAdminFeedback, replyToFeedback } from '../api/authService'; 
+import { subscribeToEvents } from '../api/realtime';
 
 const AdminFeedback = () => {
   const navigate = useNavigate();
@@ -10,17 +11,26 @@ const AdminFeedback = () => {
   const [replyText, setReplyText] = useState({});
   const [repliedItems, setRepliedItems] = useState({});
   const [error, setError] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     loadData();
   }, []);
 
-  const loadData = async () => {
-    setLoading(true);
+  // Newly submitted feedback shows up without reloading the page
+  useEffect(() => subscribeToEvents((event) => {
+    if (event.type === 'feedback.created') loadData();
+  }), []);
+
+  // The inbox is paged newest first; a cursor appends the next page, no cursor starts over
+  const loadData = async (cursor = null) => {
+    cursor ? setLoadingMore(true) : setLoading(true);
     setError(null);
     try {
-      const data = await getAdminFeedback();
-      setAllFeedback(Array.isArray(data) ? data : []);
+      const page = await getAdminFeedback({ cursor: cursor || undefined });
+      setAllFeedback(prev => (cursor ? [...prev, ...page.results] : page.results));
+      setNextCursor(page.next_cursor);
     } catch (err) {
       console.error("Fetch Error:", err);
       if (err.status === 403 || err.response?.status === 403) {
@@ -30,6 +40,7 @@ const AdminFeedback = () => {
       }
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -134,6 +145,15 @@ const AdminFeedback = () => {
               No {feedbackTab} Feedback Found
             </div>
           )}
+          {nextCursor && (
+            <div className="text-center">
+              <button onClick={() => loadData(nextCursor)} disabled={loadingMore}
+                className="bg-slate-900 text-white px-10 py-4 rounded-2xl text-[10px] font-black uppercase tracking-widest hover:shadow-lg transition-all disabled:opacity-50"
+              >
+                {loadingMore ? 'Loading...' : 'Load older feedback'}
+              </button>
+            </div>
+          )}
         </div>
       </div>
     </div>
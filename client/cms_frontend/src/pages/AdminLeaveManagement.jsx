@@ -8,19 +8,23 @@ import {
 const AdminLeaveManagement = ({ type = 'staff' }) => {
   const [leaves, setLeaves] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
-  const fetchLeaves = async () => {
-    setLoading(true);
+  // The queue is paged newest first; a cursor appends the next page, no cursor starts over
+  const loadLeaves = async (cursor = null) => {
+    cursor ? setLoadingMore(true) : setLoading(true);
     try {
       // Logic to call the correct function based on the 'type' prop
-      const data = type === 'staff' 
-        ? await getAdminStaffLeaves() 
-        : await getAdminStudentLeaves();
-      setLeaves(data);
+      const fetchPage = type === 'staff' ? getAdminStaffLeaves : getAdminStudentLeaves;
+      const page = await fetchPage({ cursor: cursor || undefined });
+      setLeaves(prev => (cursor ? [...prev, ...page.results] : page.results));
+      setNextCursor(page.next_cursor);
     } catch (err) {
       console.error("Failed to fetch leaves:", err);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -37,7 +41,7 @@ const AdminLeaveManagement = ({ type = 'staff' }) => {
   };
 
   useEffect(() => { 
-    fetchLeaves(); 
+    loadLeaves(); 
   }, [type]);
 
   const StatusBadge = ({ status }) => {
@@ -142,6 +146,15 @@ const AdminLeaveManagement = ({ type = 'staff' }) => {
               )}
             </tbody>
           </table>
+          {nextCursor && (
+            <div className="p-6 border-t border-slate-100 text-center">
+              <button onClick={() => loadLeaves(nextCursor)} disabled={loadingMore}
+                className="px-6 py-2.5 rounded-xl text-[10px] font-black uppercase tracking-widest bg-slate-800 text-white shadow-lg disabled:opacity-50"
+              >
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            </div>
+          )}
         </div>
       </div>
     </div>
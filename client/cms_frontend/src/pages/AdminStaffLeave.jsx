@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { getAdminStaffLeaves, updateLeaveStatus, getUserProfile } from '../api/authService';
+import { subscribeToEvents } from '../api/realtime';
 
 const AdminStaffLeave = () => {
   const navigate = useNavigate();
@@ -8,25 +9,42 @@ const AdminStaffLeave = () => {
   const [loading, setLoading] = useState(true);
   const [filter, setFilter] = useState('all');
   const [userProfile, setUserProfile] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  // The queue is paged newest first; a cursor appends the next page, no cursor starts over
+  const loadLeaves = async (cursor = null) => {
+    cursor ? setLoadingMore(true) : setLoading(true);
+    try {
+      const page = await getAdminStaffLeaves({
+        status: filter === 'all' ? undefined : filter,
+        cursor: cursor || undefined,
+      });
+      setLeaves(prev => (cursor ? [...prev, ...page.results] : page.results));
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      console.error("Failed to fetch leaves:", err);
+    } finally {
+      setLoading(false);
+      setLoadingMore(false);
+    }
+  };
 
   useEffect(() => {
-    const fetchData = async () => {
-      try {
-        const [leaveData, profileData] = await Promise.all([
-          getAdminStaffLeaves(),
-          getUserProfile()
-        ]);
-        setLeaves(Array.isArray(leaveData) ? leaveData : []);
-        setUserProfile(profileData);
-      } catch (err) {
-        console.error("Initialization error:", err);
-      } finally {
-        setLoading(false);
-      }
-    };
-    fetchData();
+    getUserProfile().then(setUserProfile).catch(err => console.error("Initialization error:", err));
   }, []);
 
+  useEffect(() => {
+    loadLeaves();
+  }, [filter]);
+
+  // New and decided staff leaves reload the first page instead of waiting for a manual refresh
+  useEffect(() => subscribeToEvents((event) => {
+    if ((event.type === 'leave.created' || event.type === 'leave.updated') && event.data.type === 'staff') {
+      loadLeaves();
+    }
+  }), [filter]);
+
   const handleAction = async (id, status) => {
     try {
       // type is set to 'staff' to hit the correct backend logic
@@ -168,6 +186,15 @@ const AdminStaffLeave = () => {
                 )}
               </tbody>
             </table>
+            {nextCursor && (
+              <div className="p-6 border-t border-slate-100 text-center">
+                <button onClick={() => loadLeaves(nextCursor)} disabled={loadingMore}
+                  className="px-6 py-2.5 rounded-xl text-[10px] font-black uppercase tracking-widest bg-slate-800 text-white shadow-lg disabled:opacity-50"
+                >
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </button>
+              </div>
+            )}
           </div>
         </div>
       </main>
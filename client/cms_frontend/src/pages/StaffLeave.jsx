@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { applyStaffLeave, getStaffLeaveHistory } from '../api/authService';
+import { subscribeToEvents } from '../api/realtime';
 
 const StaffLeave = () => {
   const navigate = useNavigate();
@@ -17,6 +18,11 @@ const StaffLeave = () => {
     fetchHistory();
   }, []);
 
+  // A leave approved or rejected by the admin updates the history in place
+  useEffect(() => subscribeToEvents((event) => {
+    if (event.type === 'leave.updated') fetchHistory();
+  }), []);
+
   const fetchHistory = async () => {
     try {
       const data = await getStaffLeaveHistory();
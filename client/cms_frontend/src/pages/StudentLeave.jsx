@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom'; // 1. Import useNavigate
 import { applyStudentLeave, getStudentLeaveHistory } from '../api/authService'; 
+import { subscribeToEvents } from '../api/realtime';
 
 const StudentLeave = () => {
   const navigate = useNavigate(); // 2. Initialize navigate
@@ -23,6 +24,11 @@ const StudentLeave = () => {
     fetchHistory();
   }, []);
 
+  // A leave approved or rejected by the admin updates the history in place
+  useEffect(() => subscribeToEvents((event) => {
+    if (event.type === 'leave.updated') fetchHistory();
+  }), []);
+
   // Handle Form Submission
   const handleSubmit = async (e) => {
     e.preventDefault();
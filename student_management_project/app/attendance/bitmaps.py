@@ -0,0 +1,208 @@
+"""
+Compact attendance store: each (subject, session) is kept as two bit matrices,
+students x class dates, so course-wide analytics are popcounts and shifts over
+Python ints instead of scans over AttendanceReport rows.
+
+A bitmap is built by rebuild_bitmap() the first time save_attendance_sheets() touches its
+subject/session (or by the build_attendance_bitmaps task, queued by an analytics request for
+data saved before bitmaps existed, or via `manage.py rebuild_attendance_bitmaps`) and kept in
+sync by save_attendance_sheets() from then on. Both paths lock the bitmap row before reading
+reports or applying marks, so a save committing during a rebuild is never lost.
+"""
+import bisect
+from functools import reduce
+import operator
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import AttendanceBitmap, AttendanceReport
+
+
+class BitMatrix:
+    """In-memory view of an AttendanceBitmap: one int per student row, bit j = class_dates[j]."""
+
+    def __init__(self, class_dates, student_ids, present_rows, taken_rows):
+        self.class_dates = class_dates
+        self.student_ids = student_ids
+        self.present_rows = present_rows
+        self.taken_rows = taken_rows
+        self._row_of = {sid: i for i, sid in enumerate(student_ids)}
+
+    @property
+    def width(self):
+        return (len(self.class_dates) + 7) // 8
+
+    @classmethod
+    def empty(cls):
+        return cls([], [], [], [])
+
+    @classmethod
+    def from_model(cls, bitmap):
+        width = (len(bitmap.class_dates) + 7) // 8
+
+        def unpack(blob):
+            blob = bytes(blob)
+            return [
+                int.from_bytes(blob[i * width:(i + 1) * width], 'little')
+                for i in range(len(bitmap.student_ids))
+            ]
+
+        return cls(
+            list(bitmap.class_dates),
+            list(bitmap.student_ids),
+            unpack(bitmap.present_bits),
+            unpack(bitmap.taken_bits),
+        )
+
+    def to_model(self, bitmap):
+        width = self.width
+        bitmap.class_dates = self.class_dates
+        bitmap.student_ids = self.student_ids
+        bitmap.present_bits = b''.join(row.to_bytes(width, 'little') for row in self.present_rows)
+        bitmap.taken_bits = b''.join(row.to_bytes(width, 'little') for row in self.taken_rows)
+        return bitmap
+
+    def _column(self, day):
+        """Returns the bit index for an ISO date, inserting a column (and shifting later bits) if needed."""
+        pos = bisect.bisect_left(self.class_dates, day)
+        if pos < len(self.class_dates) and self.class_dates[pos] == day:
+            return pos
+
+        self.class_dates.insert(pos, day)
+        if pos < len(self.class_dates) - 1:
+            low_mask = (1 << pos) - 1
+
+            def shift(row):
+                return (row & low_mask) | ((row >> pos) << (pos + 1))
+
+            self.present_rows = [shift(row) for row in self.present_rows]
+            self.taken_rows = [shift(row) for row in self.taken_rows]
+        return pos
+
+    def _row(self, student_id):
+        row = self._row_of.get(student_id)
+        if row is None:
+            row = len(self.student_ids)
+            self.student_ids.append(student_id)
+            self.present_rows.append(0)
+            self.taken_rows.append(0)
+            self._row_of[student_id] = row
+        return row
+
+    def set(self, student_id, day, status):
+        col = self._column(day)
+        row = self._row(student_id)
+        bit = 1 << col
+        self.taken_rows[row] |= bit
+        if status:
+            self.present_rows[row] |= bit
+        else:
+            self.present_rows[row] &= ~bit
+
+
+def build_bitmap(subject_id, session_year_id):
+    """
+    Builds the bitmap for one subject/session from AttendanceReport in one query, without
+    saving it. analyse_bitmap() accepts the unsaved instance.
+    """
+    matrix = BitMatrix.empty()
+    reports = AttendanceReport.objects.filter(
+        attendance_id__subject_id=subject_id,
+        attendance_id__session_year_id=session_year_id,
+    ).values_list('student_id', 'attendance_id__attendance_date', 'status').order_by(
+        'attendance_id__attendance_date'
+    )
+    for student_id, day, status in reports.iterator(chunk_size=5000):
+        matrix.set(student_id, day.isoformat(), status)
+    return matrix.to_model(AttendanceBitmap(subject_id_id=subject_id, session_year_id_id=session_year_id))
+
+
+def rebuild_bitmap(subject_id, session_year_id):
+    """
+    Builds (or replaces) the stored bitmap for one subject/session. The row is created and
+    locked before the reports are read, so a concurrent save either committed before the read
+    or waits in sync_bitmaps() and applies its marks on top of this build.
+    """
+    with transaction.atomic():
+        bitmap, _ = AttendanceBitmap.objects.get_or_create(
+            subject_id_id=subject_id, session_year_id_id=session_year_id
+        )
+        bitmap = AttendanceBitmap.objects.select_for_update().get(pk=bitmap.pk)
+        built = build_bitmap(subject_id, session_year_id)
+        for field in ('class_dates', 'student_ids', 'present_bits', 'taken_bits'):
+            setattr(bitmap, field, getattr(built, field))
+        bitmap.save()
+    return bitmap
+
+
+def sync_bitmaps(marks):
+    """
+    Applies saved marks to the bitmaps of their subjects/sessions, building the ones that do
+    not exist yet (that build reads the marks just saved in this transaction).
+    `marks` is an iterable of ((subject_id, date, session_year_id), student_id, status).
+    Costs one SELECT ... FOR UPDATE and one bulk UPDATE however many marks there are, plus a
+    rebuild for each new subject/session.
+    """
+    by_key = {}
+    for (sub, day, sess), student_id, status in marks:
+        by_key.setdefault((sub, sess), []).append((student_id, day.isoformat(), status))
+    if not by_key:
+        return
+
+    lookup = reduce(operator.or_, (
+        Q(subject_id_id=sub, session_year_id_id=sess) for sub, sess in by_key
+    ))
+    with transaction.atomic():
+        bitmaps = list(AttendanceBitmap.objects.select_for_update().filter(lookup).order_by('id'))
+        found = {(bitmap.subject_id_id, bitmap.session_year_id_id) for bitmap in bitmaps}
+        for sub, sess in sorted(by_key.keys() - found):
+            rebuild_bitmap(sub, sess)
+
+        for bitmap in bitmaps:
+            matrix = BitMatrix.from_model(bitmap)
+            for student_id, day, status in by_key[(bitmap.subject_id_id, bitmap.session_year_id_id)]:
+                matrix.set(student_id, day, status)
+            matrix.to_model(bitmap)
+        AttendanceBitmap.objects.bulk_update(
+            bitmaps, ['class_dates', 'student_ids', 'present_bits', 'taken_bits']
+        )
+
+
+def _longest_run(bits):
+    """Length of the longest run of set bits: each AND with its own shift trims every run by one."""
+    run = 0
+    while bits:
+        bits &= bits >> 1
+        run += 1
+    return run
+
+
+def analyse_bitmap(bitmap, threshold):
+    """Per-student percentages and absence streaks, plus the students below `threshold` percent."""
+    matrix = BitMatrix.from_model(bitmap)
+    columns = len(matrix.class_dates)
+    mask = (1 << columns) - 1
+
+    students = []
+    for student_id, present_row, taken_row in zip(matrix.student_ids, matrix.present_rows, matrix.taken_rows):
+        total = taken_row.bit_count()
+        present = present_row.bit_count()
+        absent_row = taken_row & ~present_row
+        students.append({
+            "student_id": student_id,
+            "present": present,
+            "total": total,
+            "percent": round((present / total * 100), 2) if total > 0 else 0,
+            "longest_absence_streak": _longest_run(absent_row),
+            # Absences counted back from the latest class date
+            "current_absence_streak": columns - ((~absent_row) & mask).bit_length(),
+        })
+
+    return {
+        "subject_id": bitmap.subject_id_id,
+        "session_year_id": bitmap.session_year_id_id,
+        "classes": columns,
+        "students": students,
+        "below_threshold": [s["student_id"] for s in students if s["total"] and s["percent"] < threshold],
+    }
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from app.attendance.bitmaps import rebuild_bitmap
+from app.attendance.models import Attendance
+
+
+class Command(BaseCommand):
+    help = "Builds the compact AttendanceBitmap store for every subject/session that has attendance."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subject', type=int, help="Only rebuild this subject id")
+        parser.add_argument('--session', type=int, help="Only rebuild this session year id")
+
+    def handle(self, *args, **options):
+        pairs = Attendance.objects.values_list('subject_id', 'session_year_id').distinct().order_by()
+        if options['subject']:
+            pairs = pairs.filter(subject_id=options['subject'])
+        if options['session']:
+            pairs = pairs.filter(session_year_id=options['session'])
+
+        count = 0
+        for subject_id, session_year_id in pairs:
+            rebuild_bitmap(subject_id, session_year_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} attendance bitmaps"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from app.attendance.services import rebuild_attendance_summary
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the AttendanceSummary counters from scratch using AttendanceReport."
+
+    def handle(self, *args, **options):
+        count = rebuild_attendance_summary()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} attendance summary rows"))
@@ -0,0 +1,56 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_summary(apps, schema_editor):
+    AttendanceReport = apps.get_model('attendance', 'AttendanceReport')
+    AttendanceSummary = apps.get_model('attendance', 'AttendanceSummary')
+
+    rows = AttendanceReport.objects.values(
+        'student_id', 'attendance_id__subject_id', 'attendance_id__session_year_id'
+    ).annotate(
+        total_count=models.Count('id'),
+        present_count=models.Count('id', filter=models.Q(status=True)),
+    ).order_by()
+
+    AttendanceSummary.objects.bulk_create((
+        AttendanceSummary(
+            student_id_id=row['student_id'],
+            subject_id_id=row['attendance_id__subject_id'],
+            session_year_id_id=row['attendance_id__session_year_id'],
+            present=row['present_count'],
+            total=row['total_count'],
+        ) for row in rows.iterator(chunk_size=2000)
+    ), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_customuser_gender'),
+        ('attendance', '0002_alter_attendance_subject_id_and_more'),
+        ('core', '0002_contactmessage'),
+        ('curriculum', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceSummary',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('session_year_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.sessionyearmodel')),
+                ('student_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accounts.students')),
+                ('subject_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='curriculum.subjects')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('student_id', 'subject_id', 'session_year_id'), name='unique_attendance_summary')],
+            },
+        ),
+        migrations.RunPython(populate_summary, migrations.RunPython.noop),
+    ]
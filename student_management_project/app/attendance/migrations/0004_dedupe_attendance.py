@@ -0,0 +1,55 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:51
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+populate_summary = import_module('app.attendance.migrations.0003_attendancesummary').populate_summary
+
+
+def dedupe_attendance(apps, schema_editor):
+    """Collapses duplicate sheets and reports so the unique constraints in 0005 can be added."""
+    Attendance = apps.get_model('attendance', 'Attendance')
+    AttendanceReport = apps.get_model('attendance', 'AttendanceReport')
+    AttendanceSummary = apps.get_model('attendance', 'AttendanceSummary')
+    changed = False
+
+    # Keep the oldest sheet for each (subject, date, session) and move the others' reports onto it
+    duplicate_sheets = Attendance.objects.values(
+        'subject_id', 'attendance_date', 'session_year_id'
+    ).annotate(keep=models.Min('id'), n=models.Count('id')).filter(n__gt=1).order_by()
+    for sheet in duplicate_sheets.iterator():
+        extra = Attendance.objects.filter(
+            subject_id=sheet['subject_id'],
+            attendance_date=sheet['attendance_date'],
+            session_year_id=sheet['session_year_id'],
+        ).exclude(id=sheet['keep'])
+        AttendanceReport.objects.filter(attendance_id__in=extra).update(attendance_id=sheet['keep'])
+        extra.delete()
+        changed = True
+
+    # Keep the most recently written report for each (student, sheet)
+    duplicate_reports = AttendanceReport.objects.values(
+        'student_id', 'attendance_id'
+    ).annotate(keep=models.Max('id'), n=models.Count('id')).filter(n__gt=1).order_by()
+    for report in duplicate_reports.iterator():
+        AttendanceReport.objects.filter(
+            student_id=report['student_id'],
+            attendance_id=report['attendance_id'],
+        ).exclude(id=report['keep']).delete()
+        changed = True
+
+    if changed:
+        AttendanceSummary.objects.all().delete()
+        populate_summary(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_attendancesummary'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_attendance, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_customuser_gender'),
+        ('attendance', '0004_dedupe_attendance'),
+        ('core', '0002_contactmessage'),
+        ('curriculum', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendancereport',
+            name='attendance_id',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='attendance.attendance'),
+        ),
+        migrations.AlterField(
+            model_name='attendancereport',
+            name='student_id',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='accounts.students'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancereport',
+            index=models.Index(fields=['attendance_id', 'status'], name='att_report_att_status_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(fields=('subject_id', 'attendance_date', 'session_year_id'), name='unique_attendance_sheet'),
+        ),
+        migrations.AddConstraint(
+            model_name='attendancereport',
+            constraint=models.UniqueConstraint(fields=('student_id', 'attendance_id'), name='unique_attendance_report'),
+        ),
+    ]
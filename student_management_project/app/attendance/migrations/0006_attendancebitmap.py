@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_attendance_constraints'),
+        ('core', '0002_contactmessage'),
+        ('curriculum', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceBitmap',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('class_dates', models.JSONField(default=list)),
+                ('student_ids', models.JSONField(default=list)),
+                ('present_bits', models.BinaryField(default=b'')),
+                ('taken_bits', models.BinaryField(default=b'')),
+                ('session_year_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.sessionyearmodel')),
+                ('subject_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='curriculum.subjects')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('subject_id', 'session_year_id'), name='unique_attendance_bitmap')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_customuser_gender'),
+        ('attendance', '0007_attendancesyncsheet'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendancereport',
+            index=models.Index(fields=['updated_at'], name='att_report_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-18 20:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0008_attendancereport_att_report_updated_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendancesyncsheet',
+            name='idempotency_key',
+            field=models.CharField(max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='attendancesyncsheet',
+            constraint=models.UniqueConstraint(fields=('submitted_by', 'idempotency_key'), name='unique_sync_sheet_key'),
+        ),
+    ]
@@ -7,8 +7,94 @@ class Attendance(BaseModel):
     attendance_date = models.DateField()
     session_year_id = models.ForeignKey('core.SessionYearModel', on_delete=models.CASCADE)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['subject_id', 'attendance_date', 'session_year_id'],
+                name='unique_attendance_sheet',
+            ),
+        ]
+
 class AttendanceReport(BaseModel):
+    id = models.AutoField(primary_key=True)
+    # Both FK columns are served by the composite indexes below
+    student_id = models.ForeignKey('accounts.Students', on_delete=models.CASCADE, db_index=False)
+    attendance_id = models.ForeignKey(Attendance, on_delete=models.CASCADE, db_index=False)
+    status = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student_id', 'attendance_id'],
+                name='unique_attendance_report',
+            ),
+        ]
+        indexes = [
+            # Per-sheet lookups and present/absent counts
+            models.Index(fields=['attendance_id', 'status'], name='att_report_att_status_idx'),
+            # Change scans for the low-attendance job
+            models.Index(fields=['updated_at'], name='att_report_updated_idx'),
+        ]
+
+class AttendanceSummary(BaseModel):
+    """Running present/total counters per student, subject and session, kept in step with AttendanceReport."""
     id = models.AutoField(primary_key=True)
     student_id = models.ForeignKey('accounts.Students', on_delete=models.CASCADE)
-    attendance_id = models.ForeignKey(Attendance, on_delete=models.CASCADE)
-    status = models.BooleanField(default=False)
\ No newline at end of file
+    subject_id = models.ForeignKey('curriculum.Subjects', on_delete=models.CASCADE)
+    session_year_id = models.ForeignKey('core.SessionYearModel', on_delete=models.CASCADE)
+    present = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student_id', 'subject_id', 'session_year_id'],
+                name='unique_attendance_summary',
+            ),
+        ]
+
+class AttendanceBitmap(BaseModel):
+    """
+    Packed presence matrix for one subject and session: one row per student, one bit per class date.
+    Rows are stored back to back, each (len(class_dates) + 7) // 8 bytes, little-endian.
+    """
+    id = models.AutoField(primary_key=True)
+    subject_id = models.ForeignKey('curriculum.Subjects', on_delete=models.CASCADE)
+    session_year_id = models.ForeignKey('core.SessionYearModel', on_delete=models.CASCADE)
+    class_dates = models.JSONField(default=list)
+    student_ids = models.JSONField(default=list)
+    present_bits = models.BinaryField(default=b'')
+    taken_bits = models.BinaryField(default=b'')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['subject_id', 'session_year_id'],
+                name='unique_attendance_bitmap',
+            ),
+        ]
+
+class AttendanceSyncSheet(BaseModel):
+    """A sheet submitted through the offline sync endpoint, deduplicated by the submitter's idempotency key."""
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    status_data = ((PENDING, "Pending"), (PROCESSING, "Processing"), (DONE, "Done"), (FAILED, "Failed"))
+
+    id = models.AutoField(primary_key=True)
+    idempotency_key = models.CharField(max_length=64)
+    submitted_by = models.ForeignKey('accounts.CustomUser', on_delete=models.CASCADE)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=status_data, default=PENDING)
+    error = models.TextField(blank=True, default='')
+
+    class Meta:
+        constraints = [
+            # Keys are generated by each client, so they only have to be unique per submitter
+            models.UniqueConstraint(
+                fields=['submitted_by', 'idempotency_key'],
+                name='unique_sync_sheet_key',
+            ),
+        ]
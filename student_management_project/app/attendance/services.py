@@ -0,0 +1,223 @@
+from functools import reduce
+import operator
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from app.accounts.models import CustomUser, Students
+from app.core.realtime import push, role_group, user_group
+from .models import Attendance, AttendanceReport, AttendanceSummary
+from .bitmaps import sync_bitmaps
+
+
+class InvalidStudentsError(Exception):
+    """Raised when a sheet references admin ids that have no Students row."""
+    def __init__(self, invalid_ids):
+        self.invalid_ids = invalid_ids
+        super().__init__("One or more student IDs are invalid")
+
+
+def _normalize_sheet(sheet):
+    att_date = parse_date(str(sheet.get("attendance_date") or ""))
+    if att_date is None:
+        raise ValueError("Missing or invalid attendance_date")
+    if not sheet.get("subject_id") or not sheet.get("session_year_id"):
+        raise ValueError("Missing subject or session ID")
+
+    to_bool = AttendanceReport._meta.get_field("status").to_python
+    entries = {}
+    for entry in sheet.get("student_ids") or []:
+        # Last entry wins if the same student is submitted twice
+        entries[int(entry["id"])] = to_bool(entry.get("status", False))
+
+    key = (int(sheet["subject_id"]), att_date, int(sheet["session_year_id"]))
+    return key, entries
+
+
+def validate_sheet(sheet):
+    """Checks a submitted sheet's shape without touching the database. Raises ValueError."""
+    if not isinstance(sheet, dict):
+        raise ValueError("Sheet must be an object")
+    if not isinstance(sheet.get("student_ids") or [], list):
+        raise ValueError("student_ids must be a list")
+    try:
+        _normalize_sheet(sheet)
+    except (KeyError, TypeError, AttributeError):
+        raise ValueError("Every student_ids entry needs an id")
+
+
+def _resolve_attendances(keys):
+    """Maps (subject, date, session) keys to Attendance ids, creating the missing ones."""
+    def fetch(wanted):
+        lookup = reduce(operator.or_, (
+            Q(subject_id_id=sub, attendance_date=day, session_year_id_id=sess)
+            for sub, day, sess in wanted
+        ))
+        return {
+            (a.subject_id_id, a.attendance_date, a.session_year_id_id): a.id
+            for a in Attendance.objects.filter(lookup).only("id", "subject_id", "attendance_date", "session_year_id")
+        }
+
+    resolved = fetch(keys)
+    missing = [key for key in keys if key not in resolved]
+    if missing:
+        # A concurrent save may create the same sheet; unique_attendance_sheet makes that a no-op
+        Attendance.objects.bulk_create([
+            Attendance(subject_id_id=sub, attendance_date=day, session_year_id_id=sess)
+            for sub, day, sess in missing
+        ], ignore_conflicts=True)
+        resolved.update(fetch(missing))
+    return resolved
+
+
+def _apply_summary_deltas(changes):
+    """
+    Applies (student, subject, session) -> (present, total) deltas with F expressions.
+    Students sharing the same delta within a subject/session are updated together,
+    so a sheet costs at most a handful of UPDATEs whatever the class size.
+    """
+    changes = {key: delta for key, delta in changes.items() if delta != (0, 0)}
+    if not changes:
+        return
+
+    AttendanceSummary.objects.bulk_create([
+        AttendanceSummary(student_id_id=stu, subject_id_id=sub, session_year_id_id=sess)
+        for stu, sub, sess in changes
+    ], ignore_conflicts=True)
+
+    groups = {}
+    for (stu, sub, sess), delta in changes.items():
+        groups.setdefault((sub, sess, delta), []).append(stu)
+
+    now = timezone.now()
+    for (sub, sess, (present, total)), students in groups.items():
+        AttendanceSummary.objects.filter(
+            subject_id_id=sub, session_year_id_id=sess, student_id_id__in=students
+        ).update(present=F("present") + present, total=F("total") + total, updated_at=now)
+
+
+def rebuild_attendance_summary():
+    """Recomputes every AttendanceSummary row from AttendanceReport. Returns the row count."""
+    rows = AttendanceReport.objects.values(
+        "student_id", "attendance_id__subject_id", "attendance_id__session_year_id"
+    ).annotate(
+        total_count=Count("id"),
+        present_count=Count("id", filter=Q(status=True)),
+    ).order_by()
+
+    with transaction.atomic():
+        AttendanceSummary.objects.all().delete()
+        created = AttendanceSummary.objects.bulk_create((
+            AttendanceSummary(
+                student_id_id=row["student_id"],
+                subject_id_id=row["attendance_id__subject_id"],
+                session_year_id_id=row["attendance_id__session_year_id"],
+                present=row["present_count"],
+                total=row["total_count"],
+            ) for row in rows.iterator(chunk_size=2000)
+        ), batch_size=1000)
+    return len(created)
+
+
+def save_attendance_sheets(sheets):
+    """
+    Upserts the reports for one or more attendance sheets in a single transaction.
+    The number of queries depends on the number of sheets, never on class size.
+    """
+    normalized = {}
+    for sheet in sheets:
+        key, entries = _normalize_sheet(sheet)
+        normalized.setdefault(key, {}).update(entries)
+    if not normalized:
+        raise ValueError("No attendance sheets supplied")
+
+    admin_ids = {admin_id for entries in normalized.values() for admin_id in entries}
+    student_map = dict(
+        Students.objects.filter(admin_id__in=admin_ids).values_list("admin_id", "id")
+    )
+    invalid_ids = sorted(admin_ids - student_map.keys())
+    if invalid_ids:
+        raise InvalidStudentsError(invalid_ids)
+
+    with transaction.atomic():
+        attendance_map = _resolve_attendances(list(normalized))
+        # Concurrent saves of the same sheet (e.g. a sync retry racing a direct save) queue here,
+        # so each one reads the reports the other committed and no row is counted as created twice.
+        # Locking in id order keeps saves spanning several sheets from deadlocking.
+        list(Attendance.objects.select_for_update().filter(
+            id__in=attendance_map.values()
+        ).order_by("id").values_list("id", flat=True))
+
+        desired = {}
+        for key, entries in normalized.items():
+            for admin_id, status in entries.items():
+                desired[(attendance_map[key], student_map[admin_id])] = status
+
+        existing = AttendanceReport.objects.filter(
+            attendance_id_id__in=set(attendance_map.values()),
+            student_id_id__in=set(student_map.values()),
+        ).only("id", "status", "student_id", "attendance_id")
+
+        now = timezone.now()
+        to_update = []
+        for report in existing:
+            pair = (report.attendance_id_id, report.student_id_id)
+            if pair not in desired:
+                continue
+            status = desired.pop(pair)
+            if report.status != status:
+                report.status = status
+                report.updated_at = now
+                to_update.append(report)
+
+        to_create = [
+            AttendanceReport(attendance_id_id=att_id, student_id_id=stu_id, status=status)
+            for (att_id, stu_id), status in desired.items()
+        ]
+
+        AttendanceReport.objects.bulk_update(to_update, ["status", "updated_at"])
+        AttendanceReport.objects.bulk_create(
+            to_create,
+            update_conflicts=True,
+            unique_fields=["student_id", "attendance_id"],
+            update_fields=["status", "updated_at"],
+        )
+
+        sheet_of = {att_id: key for key, att_id in attendance_map.items()}
+        changes = {}
+        for report, created in [(r, True) for r in to_create] + [(r, False) for r in to_update]:
+            sub, _, sess = sheet_of[report.attendance_id_id]
+            key = (report.student_id_id, sub, sess)
+            present, total = changes.get(key, (0, 0))
+            if created:
+                changes[key] = (present + int(report.status), total + 1)
+            else:
+                # An existing report only reaches to_update when its status flipped
+                changes[key] = (present + (1 if report.status else -1), total)
+        _apply_summary_deltas(changes)
+        sync_bitmaps(
+            (sheet_of[report.attendance_id_id], report.student_id_id, report.status)
+            for report in to_create + to_update
+        )
+
+        result = {
+            "sheets": len(normalized),
+            "created": len(to_create),
+            "updated": len(to_update),
+        }
+        # Each student gets their own counter deltas; admin dashboards get the totals
+        user_of = {student_id: admin_id for admin_id, student_id in student_map.items()}
+        deltas = {}
+        for (stu, sub, sess), (present, total) in changes.items():
+            if (present, total) != (0, 0):
+                deltas.setdefault(user_of[stu], []).append(
+                    {"subject_id": sub, "session_year_id": sess, "present": present, "total": total}
+                )
+        push(
+            [(user_group(user_id), 'attendance.updated', {"changes": user_changes}) for user_id, user_changes in deltas.items()]
+            + [(role_group(CustomUser.HOD), 'attendance.saved', result)]
+        )
+
+    return result
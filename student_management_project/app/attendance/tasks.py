@@ -0,0 +1,144 @@
+import datetime
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from app.core.models import JobWatermark
+from app.operations.models import NotificationStudent
+from app.operations.notifications import deliver
+from .bitmaps import rebuild_bitmap
+from .models import AttendanceReport, AttendanceSummary, AttendanceSyncSheet
+from .services import save_attendance_sheets
+
+LOW_ATTENDANCE_JOB = 'notify_low_attendance'
+# notify_low_attendance() stops this far behind the clock: updated_at is stamped before a save
+# commits, so a row newer than this may still belong to a transaction that has not committed
+LOW_ATTENDANCE_LAG = datetime.timedelta(minutes=15)
+
+
+# A sheet still pending or processing after this long lost its task or its worker
+SYNC_STALE_AFTER = datetime.timedelta(minutes=15)
+
+
+@shared_task
+def ingest_attendance_sheets(sheet_ids):
+    """Saves queued sync sheets one by one so a bad sheet fails on its own."""
+    for sheet_id in sheet_ids:
+        # Claim the sheet first; a redelivered task finds it already taken.
+        # updated_at marks the claim, which requeue_stale_sync_sheets() times out.
+        claimed = AttendanceSyncSheet.objects.filter(
+            id=sheet_id, status=AttendanceSyncSheet.PENDING
+        ).update(status=AttendanceSyncSheet.PROCESSING, updated_at=timezone.now())
+        if not claimed:
+            continue
+
+        sheet = AttendanceSyncSheet.objects.get(id=sheet_id)
+        try:
+            save_attendance_sheets([sheet.payload])
+            sheet.status = AttendanceSyncSheet.DONE
+            sheet.error = ''
+        except Exception as e:
+            sheet.status = AttendanceSyncSheet.FAILED
+            sheet.error = str(e)
+        sheet.save(update_fields=['status', 'error', 'updated_at'])
+
+
+@shared_task
+def requeue_stale_sync_sheets():
+    """
+    Periodic: puts sync sheets whose worker crashed mid-save (or whose task never reached the
+    broker) back in the queue. Saving a sheet twice is safe, since reports are upserted.
+    """
+    stale = AttendanceSyncSheet.objects.filter(
+        status__in=[AttendanceSyncSheet.PENDING, AttendanceSyncSheet.PROCESSING],
+        updated_at__lt=timezone.now() - SYNC_STALE_AFTER,
+    )
+    with transaction.atomic():
+        sheet_ids = list(stale.select_for_update(skip_locked=True).values_list('id', flat=True))
+        AttendanceSyncSheet.objects.filter(id__in=sheet_ids).update(
+            status=AttendanceSyncSheet.PENDING, updated_at=timezone.now()
+        )
+    if sheet_ids:
+        ingest_attendance_sheets.delay(sheet_ids)
+    return len(sheet_ids)
+
+
+# How long a queued bitmap build keeps later requests from queueing it again
+BITMAP_BUILD_QUEUED_FOR = 10 * 60
+
+
+def _bitmap_build_key(subject_id, session_year_id):
+    return f"attendance:bitmap-build:{subject_id}:{session_year_id}"
+
+
+@shared_task
+def build_attendance_bitmaps(subject_ids, session_year_id):
+    """Stores the bitmaps an analytics request found missing; later requests read them."""
+    for subject_id in subject_ids:
+        rebuild_bitmap(subject_id, session_year_id)
+    return len(subject_ids)
+
+
+def queue_bitmap_builds(subject_ids, session_year_id):
+    """
+    Queues build_attendance_bitmaps for the subjects no earlier request has queued, so
+    repeated requests for a missing bitmap enqueue one build per subject and session.
+    """
+    queued = [
+        subject_id for subject_id in subject_ids
+        if cache.add(_bitmap_build_key(subject_id, session_year_id), 1, BITMAP_BUILD_QUEUED_FOR)
+    ]
+    if queued:
+        build_attendance_bitmaps.delay(queued, session_year_id)
+    return queued
+
+
+@shared_task
+def notify_low_attendance(threshold=None):
+    """
+    Nightly: notifies students whose attendance in a subject is below `threshold` percent.
+    Only (student, subject) pairs with reports written since the last run are re-checked,
+    their percentages come from AttendanceSummary, and the notifications go out through deliver() in bulk.
+    Each run covers reports up to LOW_ATTENDANCE_LAG ago; later ones are left to the next run,
+    so a save still committing while this runs is picked up then rather than skipped.
+    """
+    if threshold is None:
+        threshold = settings.ATTENDANCE_ALERT_THRESHOLD
+
+    now = timezone.now() - LOW_ATTENDANCE_LAG
+    mark = JobWatermark.objects.filter(name=LOW_ATTENDANCE_JOB).first()
+
+    changed = AttendanceReport.objects.filter(updated_at__lte=now)
+    if mark:
+        changed = changed.filter(updated_at__gt=mark.watermark)
+    pairs = set(changed.values_list('student_id', 'attendance_id__subject_id').distinct().order_by())
+
+    notifications = []  # (student_id, user_id, message)
+    if pairs:
+        totals = AttendanceSummary.objects.filter(
+            student_id__in={stu for stu, _ in pairs},
+            subject_id__in={sub for _, sub in pairs},
+        ).values('student_id', 'student_id__admin_id', 'subject_id', 'subject_id__subject_name').annotate(
+            present_sum=Sum('present'), total_sum=Sum('total'),
+        ).order_by()
+
+        for row in totals:
+            if (row['student_id'], row['subject_id']) not in pairs or not row['total_sum']:
+                continue
+            percent = round(row['present_sum'] / row['total_sum'] * 100, 2)
+            if percent < threshold:
+                notifications.append((
+                    row['student_id'],
+                    row['student_id__admin_id'],
+                    f"Your attendance in {row['subject_id__subject_name']} is {percent}%, "
+                    f"below the required {threshold:g}%.",
+                ))
+
+    with transaction.atomic():
+        deliver(NotificationStudent, notifications)
+        JobWatermark.objects.update_or_create(name=LOW_ATTENDANCE_JOB, defaults={'watermark': now})
+    return len(notifications)
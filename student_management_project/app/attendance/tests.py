@@ -1,3 +1,286 @@
+import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.db.models import QuerySet
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from app.accounts.models import CustomUser, Students
+from app.core.models import SessionYearModel
+from app.curriculum.models import Courses, Subjects
+from .bitmaps import BitMatrix, rebuild_bitmap
+from .models import Attendance, AttendanceBitmap, AttendanceReport, AttendanceSummary, AttendanceSyncSheet
+from .services import rebuild_attendance_summary
+from .tasks import ingest_attendance_sheets
+
+
+class AttendanceIndexPlanTests(TestCase):
+    """Guards the hot attendance filters against falling back to table scans."""
+
+    @classmethod
+    def setUpTestData(cls):
+        staff = CustomUser.objects.create_user(
+            username='plan.staff', email='plan.staff@example.com', password='pass', user_type='2'
+        )
+        user = CustomUser.objects.create_user(
+            username='plan.student', email='plan.student@example.com', password='pass', user_type='3'
+        )
+        course = Courses.objects.create(course_name='Plan Course')
+        cls.session = SessionYearModel.objects.create(
+            session_start_year=datetime.date(2025, 1, 1), session_end_year=datetime.date(2025, 12, 31)
+        )
+        cls.subject = Subjects.objects.create(subject_name='Plan Subject', course_id=course, staff_id=staff)
+        cls.student = Students.objects.create(admin=user, course_id=course, session_year_id=cls.session)
+        cls.attendance = Attendance.objects.create(
+            subject_id=cls.subject, attendance_date=datetime.date(2025, 3, 1), session_year_id=cls.session
+        )
+        AttendanceReport.objects.create(student_id=cls.student, attendance_id=cls.attendance, status=True)
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # Tiny test tables would otherwise always be seq-scanned
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset, *columns):
+        """Asserts the plan is an index search bound on every given column."""
+        plan = queryset.explain()
+        if connection.vendor == 'sqlite':
+            self.assertRegex(plan, r'SEARCH \w+ USING (COVERING )?INDEX')
+            for column in columns:
+                self.assertIn(f'{column}=?', plan)
+        else:
+            self.assertNotIn('Seq Scan', plan)
+            self.assertIn('Index', plan)
+
+    def test_sheet_lookup_uses_unique_index(self):
+        self.assertUsesIndex(Attendance.objects.filter(
+            subject_id=self.subject,
+            attendance_date=datetime.date(2025, 3, 1),
+            session_year_id=self.session,
+        ), 'subject_id_id', 'attendance_date', 'session_year_id_id')
+
+    def test_report_lookup_uses_unique_index(self):
+        self.assertUsesIndex(AttendanceReport.objects.filter(
+            student_id=self.student, attendance_id=self.attendance
+        ), 'student_id_id', 'attendance_id_id')
+
+    def test_sheet_status_count_uses_composite_index(self):
+        self.assertUsesIndex(AttendanceReport.objects.filter(
+            attendance_id=self.attendance, status=True
+        ), 'attendance_id_id')
+
+    def test_student_reports_use_unique_index(self):
+        self.assertUsesIndex(AttendanceReport.objects.filter(student_id=self.student), 'student_id_id')
+
+    def test_duplicate_reports_are_rejected(self):
+        with self.assertRaises(IntegrityError):
+            AttendanceReport.objects.create(student_id=self.student, attendance_id=self.attendance)
+
+
+class AttendanceSheetTestCase(TestCase):
+    """A course with two subjects and eight students, plus helpers to save sheets through the API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create_user(
+            username='save.staff', email='save.staff@example.com', password='pass', user_type='2'
+        )
+        cls.hod = CustomUser.objects.create_user(
+            username='save.hod', email='save.hod@example.com', password='pass', user_type='1'
+        )
+        course = Courses.objects.create(course_name='Save Course')
+        cls.session = SessionYearModel.objects.create(
+            session_start_year=datetime.date(2025, 1, 1), session_end_year=datetime.date(2025, 12, 31)
+        )
+        cls.subjects = [
+            Subjects.objects.create(subject_name=f'Save Subject {i}', course_id=course, staff_id=cls.staff)
+            for i in range(2)
+        ]
+        cls.students = []
+        for i in range(8):
+            user = CustomUser.objects.create_user(
+                username=f'save.student{i}', email=f'save.student{i}@example.com', password='pass', user_type='3'
+            )
+            cls.students.append(Students.objects.create(admin=user, course_id=course, session_year_id=cls.session))
+
+    def setUp(self):
+        cache.clear()
+
+    def _client(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def _sheet(self, day, statuses, subject=0):
+        return {
+            "subject_id": self.subjects[subject].id,
+            "session_year_id": self.session.id,
+            "attendance_date": day,
+            "student_ids": [{"id": s.admin_id, "status": st} for s, st in zip(self.students, statuses)],
+        }
+
+    def _save(self, day, statuses, subject=0):
+        response = self._client(self.staff).post('/api/attendance/save/', self._sheet(day, statuses, subject), format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data
+
+    def _summary(self, subject=0):
+        """Returns ({student_id: present}, {student_id: total}) for one subject."""
+        rows = AttendanceSummary.objects.filter(subject_id=self.subjects[subject]).values_list(
+            'student_id', 'present', 'total'
+        )
+        return {sid: present for sid, present, _ in rows}, {sid: total for sid, _, total in rows}
+
+
+class AttendanceSaveTests(AttendanceSheetTestCase):
+    """Bulk sheet saves: query count, locking, summary deltas and bitmap upkeep."""
+
+    def test_query_count_does_not_grow_with_the_sheet(self):
+        # The first save of a subject also builds its bitmap
+        self._save('2025-03-01', [True])
+        with CaptureQueriesContext(connection) as small_create:
+            self._save('2025-03-02', [True, False])
+        with self.assertNumQueries(len(small_create)):
+            self._save('2025-03-03', [True, False] * 4)
+
+        with CaptureQueriesContext(connection) as small_update:
+            self._save('2025-03-02', [False, True])
+        with self.assertNumQueries(len(small_update)):
+            self._save('2025-03-03', [False, True] * 4)
+
+    def test_sheets_are_locked_before_reports_are_read(self):
+        self._save('2025-03-01', [True] * 8)
+        locked = []
+        original = QuerySet.select_for_update
+
+        def record(queryset, *args, **kwargs):
+            locked.append(queryset.model)
+            return original(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, 'select_for_update', autospec=True, side_effect=record):
+            self._save('2025-03-01', [False] * 8)
+        self.assertEqual(locked, [Attendance, AttendanceBitmap])
+
+    def test_resaving_applies_only_the_changes_to_the_summary(self):
+        self._save('2025-03-01', [True, False, True])
+        self._save('2025-03-02', [True, True])
+        present, total = self._summary()
+        self.assertEqual(present[self.students[0].id], 2)
+        self.assertEqual(present[self.students[1].id], 1)
+        self.assertEqual(total[self.students[2].id], 1)
+
+        # Flipping one mark moves `present` only; re-saving the same marks changes nothing
+        self._save('2025-03-01', [False, False, True])
+        self._save('2025-03-01', [False, False, True])
+        present, total = self._summary()
+        self.assertEqual(present[self.students[0].id], 1)
+        self.assertEqual(total[self.students[0].id], 2)
+
+        counters = sorted(AttendanceSummary.objects.values_list('student_id', 'subject_id', 'present', 'total'))
+        rebuild_attendance_summary()
+        self.assertEqual(
+            counters, sorted(AttendanceSummary.objects.values_list('student_id', 'subject_id', 'present', 'total'))
+        )
+
+    def test_saved_bitmap_matches_a_rebuild(self):
+        self._save('2025-03-05', [True, False, False, True])
+        self._save('2025-03-01', [False, True])  # inserts a column before the existing one
+        self._save('2025-03-05', [True, True, True, False, True])  # flips marks and adds a student
+        stored = BitMatrix.from_model(AttendanceBitmap.objects.get(subject_id=self.subjects[0]))
+        rebuilt = BitMatrix.from_model(rebuild_bitmap(self.subjects[0].id, self.session.id))
+
+        def rows(matrix):
+            return sorted(zip(matrix.student_ids, matrix.present_rows, matrix.taken_rows))
+        self.assertEqual(stored.class_dates, rebuilt.class_dates)
+        self.assertEqual(rows(stored), rows(rebuilt))
+
+    def test_missing_bitmaps_are_queued_once(self):
+        self._save('2025-03-01', [True, False])
+        AttendanceBitmap.objects.all().delete()
+        params = {"subject_id": self.subjects[0].id, "session_year_id": self.session.id}
+        with mock.patch('app.attendance.tasks.build_attendance_bitmaps.delay') as delay:
+            first = self._client(self.hod).get('/api/attendance/analytics/', params)
+            self._client(self.hod).get('/api/attendance/analytics/', params)
+        self.assertEqual(first.status_code, 200, first.data)
+        self.assertEqual(first.data['subjects'][0]['classes'], 1)
+        delay.assert_called_once_with([self.subjects[0].id], self.session.id)
+        self.assertFalse(AttendanceBitmap.objects.exists())
+
+    def test_student_stats_only_count_the_students_own_summary(self):
+        self._save('2025-03-01', [True, False, True])
+        self._save('2025-03-02', [False, False], subject=1)
+        response = self._client(self.students[0].admin).get('/api/attendance/student-stats/')
+        self.assertEqual(response.data['overview'], {"total": 2, "present": 1, "percent": 50.0})
+        self.assertEqual([row['total'] for row in response.data['breakdown']], [1, 1])
+
+
+class AttendanceSyncTests(AttendanceSheetTestCase):
+    """Offline sync: keys are deduplicated per submitter and sheets are saved by the task."""
+
+    def _sync(self, user, sheets):
+        with mock.patch('app.attendance.views.ingest_attendance_sheets.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self._client(user).post('/api/attendance/sync/', {"sheets": sheets}, format='json')
+        for call in delay.call_args_list:
+            ingest_attendance_sheets(*call.args)
+        return response
+
+    def test_a_repeated_key_is_not_queued_again(self):
+        sheet = {"key": "sheet-1", **self._sheet('2025-03-01', [True, False])}
+        first = self._sync(self.staff, [sheet])
+        self.assertEqual(first.status_code, 202, first.data)
+        self.assertEqual(first.data['sheets'], [{"key": "sheet-1", "status": "pending", "duplicate": False}])
+
+        retry = self._sync(self.staff, [{**sheet, "student_ids": []}])
+        self.assertEqual(retry.data['sheets'], [{"key": "sheet-1", "status": "done", "duplicate": True}])
+        self.assertEqual(AttendanceSyncSheet.objects.count(), 1)
+        self.assertEqual(AttendanceReport.objects.count(), 2)
+
+    def test_keys_are_scoped_to_the_submitter(self):
+        sheet = {"key": "shared", **self._sheet('2025-03-01', [True])}
+        self._sync(self.staff, [sheet])
+        other = self._sync(self.hod, [sheet])
+        self.assertFalse(other.data['sheets'][0]['duplicate'])
+        self.assertEqual(AttendanceSyncSheet.objects.filter(idempotency_key='shared').count(), 2)
+
+        poll = self._client(self.students[0].admin).get('/api/attendance/sync/', {"keys": "shared"})
+        self.assertEqual(poll.data, [{"key": "shared", "status": "unknown", "error": ""}])
+        self.assertEqual(self._sync(self.students[0].admin, [sheet]).status_code, 403)
+
+    def test_a_malformed_sheet_is_rejected_on_its_own(self):
+        response = self._sync(self.staff, [
+            {"key": "good", **self._sheet('2025-03-01', [True])},
+            {"key": "bad", "subject_id": self.subjects[0].id},
+        ])
+        self.assertEqual(response.status_code, 202, response.data)
+        self.assertEqual([s['status'] for s in response.data['sheets']], ['pending', 'rejected'])
+
+
+class AttendanceHistoryPagingTests(AttendanceSheetTestCase):
+    """History pages follow a (date, id) keyset cursor."""
+
+    def test_pages_cover_every_report_once(self):
+        for day in ('2025-03-01', '2025-03-02', '2025-03-03'):
+            self._save(day, [True, False, True])
+
+        seen, cursor = [], None
+        while True:
+            params = {"subject_id": self.subjects[0].id, "page_size": 2, "start_date": "2025-03-02"}
+            if cursor:
+                params["cursor"] = cursor
+            page = self._client(self.staff).get('/api/attendance/history/', params).data
+            seen += [row['id'] for row in page['results']]
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        expected = AttendanceReport.objects.filter(attendance_id__attendance_date__gte='2025-03-02')
+        self.assertEqual(len(seen), expected.count())
+        self.assertEqual(set(seen), set(expected.values_list('id', flat=True)))
 
-# Create your tests here.
+    def test_a_tampered_cursor_is_rejected(self):
+        response = self._client(self.staff).get('/api/attendance/history/', {"subject_id": self.subjects[0].id, "cursor": "zz"})
+        self.assertEqual(response.status_code, 400)
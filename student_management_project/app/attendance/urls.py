@@ -6,13 +6,18 @@ from .views import (
     SaveAttendanceAPIView,
     GetAttendanceDataAPIView,
     StaffSubjectList,  
-    SessionYearList   
+    SessionYearList,
+    AttendanceAnalyticsAPIView,
+    AttendanceHistoryAPIView,
+    AttendanceSyncAPIView,
+    AttendanceExportAPIView
 )
 
 urlpatterns = [
     # --- Analytics & Stats ---
     path('staff-stats/', StaffAttendanceStats.as_view(), name='api_staff_attendance_stats'),
     path('student-stats/', StudentAttendanceStats.as_view(), name='api_student_attendance_stats'),
+    path('analytics/', AttendanceAnalyticsAPIView.as_view(), name='api_attendance_analytics'),
 
     # --- Dropdown Data (The fix for your empty dropdowns) ---
     path('staff-subjects/', StaffSubjectList.as_view(), name='api_staff_subjects'),
@@ -21,5 +26,8 @@ urlpatterns = [
     # --- Attendance Operations ---
     path('fetch-students/', GetStudentsForAttendance.as_view(), name='api_get_students'),
     path('save/', SaveAttendanceAPIView.as_view(), name='api_save_attendance'),
+    path('sync/', AttendanceSyncAPIView.as_view(), name='api_sync_attendance'),
     path('fetch-data/', GetAttendanceDataAPIView.as_view(), name='api_get_attendance_data'),
+    path('history/', AttendanceHistoryAPIView.as_view(), name='api_attendance_history'),
+    path('export/', AttendanceExportAPIView.as_view(), name='api_attendance_export'),
 ]
\ No newline at end of file
@@ -1,14 +1,23 @@
+import csv
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
 from rest_framework.authentication import SessionAuthentication
-from django.db.models import Count
+from django.db.models import Count, F, FilteredRelation, Q, Sum
+from django.db.models.functions import Coalesce
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 
 from app.accounts.models import Students, Staffs
 from app.core.models import SessionYearModel
+from app.core.pagination import InvalidCursor, keyset_page, page_params
 from app.curriculum.models import Subjects
-from .models import Attendance, AttendanceReport
+from .models import Attendance, AttendanceReport, AttendanceBitmap, AttendanceSyncSheet
+from .bitmaps import analyse_bitmap, build_bitmap
+from .services import save_attendance_sheets, validate_sheet, InvalidStudentsError
+from .tasks import ingest_attendance_sheets, queue_bitmap_builds
 
 class UnsafeSessionAuthentication(SessionAuthentication):
     """Bypasses CSRF for React development and testing."""
@@ -80,34 +89,26 @@ class GetStudentsForAttendance(APIView):
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 class SaveAttendanceAPIView(APIView):
+    """Saves one sheet (legacy payload) or a list of `sheets` in a single transaction."""
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
+        sheets = request.data.get("sheets")
+        if sheets is None:
+            sheets = [{
+                "student_ids": request.data.get("student_ids"),
+                "subject_id": request.data.get("subject_id"),
+                "session_year_id": request.data.get("session_year_id"),
+                "attendance_date": request.data.get("attendance_date"),
+            }]
+
         try:
-            student_data = request.data.get("student_ids") 
-            subject_id = request.data.get("subject_id")
-            session_id = request.data.get("session_year_id")
-            att_date = request.data.get("attendance_date")
-            attendance, _ = Attendance.objects.get_or_create(
-                subject_id_id=subject_id, 
-                attendance_date=att_date, 
-                session_year_id_id=session_id
-            )
-            
-            # 2. Bulk update/create the reports
-            for entry in student_data:
-                student = Students.objects.get(admin_id=entry['id'])
-                AttendanceReport.objects.update_or_create(
-                    student_id=student, 
-                    attendance_id=attendance,
-                    defaults={'status': entry['status']}
-                )
-                
-            return Response({"message": "Attendance Saved"}, status=status.HTTP_201_CREATED)
-            
-        except Students.DoesNotExist as e:
-            return Response({"error": "One or more student IDs are invalid"}, status=400)
-        
+            result = save_attendance_sheets(sheets)
+            return Response({"message": "Attendance Saved", **result}, status=status.HTTP_201_CREATED)
+
+        except InvalidStudentsError as e:
+            return Response({"error": str(e), "invalid_ids": e.invalid_ids}, status=400)
+
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
@@ -143,21 +144,24 @@ class GetAttendanceDataAPIView(APIView):
 
             else: 
                 subject = get_object_or_404(Subjects, id=subject_id)
-                students = Students.objects.filter(course_id=subject.course_id).select_related('admin')
-
-                data = []
-                for student in students:
-                    reports = AttendanceReport.objects.filter(student_id=student, attendance_id__subject_id=subject_id)
-                    total = reports.count()
-                    present = reports.filter(status=True).count()
-                    
-                    data.append({
-                        "id": student.admin.id,
-                        "name": f"{student.admin.first_name} {student.admin.last_name}",
-                        "present": present,
-                        "total": total,
-                        "percent": round((present / total * 100), 2) if total > 0 else 0
-                    })
+
+                # One grouped query for the whole roster instead of two counts per student
+                report_filter = Q(attendancereport__attendance_id__subject_id=subject_id)
+                if session_id:
+                    report_filter &= Q(attendancereport__attendance_id__session_year_id=session_id)
+
+                students = Students.objects.filter(course_id=subject.course_id).annotate(
+                    total=Count('attendancereport', filter=report_filter),
+                    present=Count('attendancereport', filter=report_filter & Q(attendancereport__status=True)),
+                ).values('admin_id', 'admin__first_name', 'admin__last_name', 'present', 'total')
+
+                data = [{
+                    "id": s['admin_id'],
+                    "name": f"{s['admin__first_name']} {s['admin__last_name']}",
+                    "present": s['present'],
+                    "total": s['total'],
+                    "percent": round((s['present'] / s['total'] * 100), 2) if s['total'] > 0 else 0
+                } for s in students]
                 return Response(data)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -200,24 +204,26 @@ class StudentAttendanceStats(APIView):
     def get(self, request):
         try:
             student = get_object_or_404(Students, admin=request.user)
-            subjects = Subjects.objects.filter(course_id=student.course_id)
-            reports = AttendanceReport.objects.filter(student_id=student)
-            
-            total_count = reports.count()
-            present_count = reports.filter(status=True).count()
-
-            breakdown = []
-            for sub in subjects:
-                sub_reports = reports.filter(attendance_id__subject_id=sub.id)
-                sub_total = sub_reports.count()
-                sub_present = sub_reports.filter(status=True).count()
-                
-                breakdown.append({
-                    "subject": sub.subject_name,
-                    "present": sub_present,
-                    "total": sub_total,
-                    "percent": round((sub_present / sub_total * 100), 2) if sub_total > 0 else 0
-                })
+
+            # Counters are maintained by SaveAttendanceAPIView, so this never scans AttendanceReport.
+            # The join only carries this student's summary rows; subjects with no classes yet
+            # come back as zeros.
+            subjects = Subjects.objects.filter(course_id=student.course_id).annotate(
+                own_summary=FilteredRelation('attendancesummary', condition=Q(attendancesummary__student_id=student)),
+            ).annotate(
+                total=Coalesce(Sum('own_summary__total'), 0),
+                present=Coalesce(Sum('own_summary__present'), 0),
+            ).values('subject_name', 'present', 'total').order_by('id')
+
+            breakdown = [{
+                "subject": sub['subject_name'],
+                "present": sub['present'],
+                "total": sub['total'],
+                "percent": round((sub['present'] / sub['total'] * 100), 2) if sub['total'] > 0 else 0
+            } for sub in subjects]
+
+            total_count = sum(sub['total'] for sub in breakdown)
+            present_count = sum(sub['present'] for sub in breakdown)
 
             return Response({
                 "overview": {
@@ -228,4 +234,299 @@ class StudentAttendanceStats(APIView):
                 "breakdown": breakdown
             }, status=status.HTTP_200_OK)
         except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+class AttendanceAnalyticsAPIView(APIView):
+    """
+    Admin/Staff: course or subject analytics (percentages, absence streaks, below-threshold
+    list) computed over the compact bitmap store. Staff only see the subjects they teach.
+    A missing bitmap is built in memory for this response and stored by a background task,
+    queued once per subject and session however many requests find it missing.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if request.user.user_type not in ['1', '2']:
+            return Response({"detail": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            subject_id = request.query_params.get("subject_id")
+            course_id = request.query_params.get("course_id")
+            session_id = request.query_params.get("session_year_id")
+            threshold = float(request.query_params.get("threshold", 75))
+
+            if not session_id or not (subject_id or course_id):
+                return Response({"error": "session_year_id and a subject_id or course_id are required"}, status=status.HTTP_400_BAD_REQUEST)
+            session_id = int(session_id)
+
+            subjects = Subjects.objects.filter(id=subject_id) if subject_id else Subjects.objects.filter(course_id=course_id)
+            if request.user.user_type == '2':
+                if subject_id and not subjects.filter(staff_id=request.user).exists():
+                    return Response({"detail": "You do not teach this subject."}, status=status.HTTP_403_FORBIDDEN)
+                subjects = subjects.filter(staff_id=request.user)
+            subject_names = dict(subjects.values_list('id', 'subject_name'))
+
+            bitmaps = {
+                b.subject_id_id: b for b in AttendanceBitmap.objects.filter(
+                    subject_id__in=subject_names, session_year_id=session_id
+                )
+            }
+            missing = sorted(subject_names.keys() - bitmaps.keys())
+            for sub_id in missing:
+                bitmaps[sub_id] = build_bitmap(sub_id, session_id)
+            queue_bitmap_builds(missing, session_id)
+
+            results = [analyse_bitmap(bitmaps[sub_id], threshold) for sub_id in sorted(bitmaps)]
+
+            # One lookup for the display fields of every student that appears in any bitmap
+            student_ids = {s["student_id"] for r in results for s in r["students"]}
+            people = {
+                s['id']: s for s in Students.objects.filter(id__in=student_ids).values(
+                    'id', 'admin_id', 'admin__first_name', 'admin__last_name'
+                )
+            }
+            for result in results:
+                result["subject"] = subject_names[result["subject_id"]]
+                for row in result["students"]:
+                    person = people.get(row["student_id"], {})
+                    row["id"] = person.get('admin_id')
+                    row["name"] = f"{person.get('admin__first_name', '')} {person.get('admin__last_name', '')}".strip()
+
+            return Response({"threshold": threshold, "subjects": results}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AttendanceHistoryAPIView(APIView):
+    """
+    Attendance for one student or one subject over a date range, paged with (date, id) keyset cursors.
+    `mode=heatmap` returns one present/total cell per class date instead of individual reports.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            params = request.query_params
+            student_id = params.get("student_id")
+            subject_id = params.get("subject_id")
+            session_id = params.get("session_year_id")
+            start = params.get("start_date")
+            end = params.get("end_date")
+            mode = params.get("mode", "list")
+            cursor, page_size = page_params(request)
+
+            # Students only ever see their own history
+            if str(request.user.user_type) == '3':
+                student_id = request.user.id
+
+            if not student_id and not subject_id:
+                return Response({"error": "Provide a student_id or subject_id"}, status=status.HTTP_400_BAD_REQUEST)
+
+            reports = AttendanceReport.objects.all()
+            if student_id:
+                reports = reports.filter(student_id__admin_id=student_id)
+            if subject_id:
+                reports = reports.filter(attendance_id__subject_id=subject_id)
+            if session_id:
+                reports = reports.filter(attendance_id__session_year_id=session_id)
+            if start:
+                reports = reports.filter(attendance_id__attendance_date__gte=start)
+            if end:
+                reports = reports.filter(attendance_id__attendance_date__lte=end)
+
+            if mode == "heatmap":
+                days = reports.values(date=F('attendance_id__attendance_date')).annotate(
+                    present=Count('id', filter=Q(status=True)),
+                    total=Count('id'),
+                )
+                rows, next_cursor = keyset_page(days, ['date'], cursor, page_size)
+                data = [{
+                    "date": r['date'],
+                    "present": r['present'],
+                    "total": r['total'],
+                    "percent": round((r['present'] / r['total'] * 100), 2) if r['total'] > 0 else 0
+                } for r in rows]
+            else:
+                entries = reports.values(
+                    'id', 'status',
+                    date=F('attendance_id__attendance_date'),
+                    subject=F('attendance_id__subject_id__subject_name'),
+                    student=F('student_id__admin_id'),
+                    first_name=F('student_id__admin__first_name'),
+                    last_name=F('student_id__admin__last_name'),
+                )
+                rows, next_cursor = keyset_page(entries, ['date', 'id'], cursor, page_size)
+                data = [{
+                    "id": r['id'],
+                    "date": r['date'],
+                    "subject": r['subject'],
+                    "student_id": r['student'],
+                    "name": f"{r['first_name']} {r['last_name']}",
+                    "status": r['status'],
+                } for r in rows]
+
+            return Response({"results": data, "next_cursor": next_cursor}, status=status.HTTP_200_OK)
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AttendanceSyncAPIView(APIView):
+    """
+    Offline sync: POST a batch of sheets, each tagged with a client-generated `key`.
+    New sheets are acknowledged immediately and saved by a Celery task; keys seen before
+    are not queued again, and malformed sheets are rejected on their own with an error.
+    GET ?keys=a,b,c polls the status of earlier submissions.
+    Keys belong to the user who submitted them: the same key from another user is a different sheet.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def _statuses(self, user, keys):
+        sheets = AttendanceSyncSheet.objects.filter(
+            submitted_by=user, idempotency_key__in=keys
+        ).values('idempotency_key', 'status', 'error')
+        return {s['idempotency_key']: s for s in sheets}
+
+    def get(self, request):
+        keys = [k for k in request.query_params.get("keys", "").split(",") if k]
+        found = self._statuses(request.user, keys)
+        data = [
+            {"key": k, "status": found[k]['status'], "error": found[k]['error']} if k in found
+            else {"key": k, "status": "unknown", "error": ""}
+            for k in keys
+        ]
+        return Response(data, status=status.HTTP_200_OK)
+
+    def post(self, request):
+        if request.user.user_type not in ['1', '2']:
+            return Response({"detail": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
+
+        sheets = request.data.get("sheets")
+        if not isinstance(sheets, list) or not sheets:
+            return Response({"error": "Provide a non-empty list of sheets"}, status=status.HTTP_400_BAD_REQUEST)
+
+        incoming = {}
+        rejected = {}  # index in the batch -> entry reported back
+        for index, sheet in enumerate(sheets):
+            key = str(sheet.get("key") or "") if isinstance(sheet, dict) else ""
+            try:
+                if not key or len(key) > 64:
+                    raise ValueError("Every sheet needs a key of at most 64 characters")
+                validate_sheet(sheet)
+            except ValueError as e:
+                rejected[index] = {"index": index, "key": key, "status": "rejected", "error": str(e)}
+                continue
+            incoming.setdefault(key, {k: v for k, v in sheet.items() if k != "key"})
+
+        if not incoming:
+            return Response(
+                {"error": "No valid sheets", "sheets": list(rejected.values())},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        known = self._statuses(request.user, incoming)
+        new_keys = [k for k in incoming if k not in known]
+
+        # ignore_conflicts covers a retry racing its own first attempt
+        AttendanceSyncSheet.objects.bulk_create([
+            AttendanceSyncSheet(idempotency_key=k, submitted_by=request.user, payload=incoming[k])
+            for k in new_keys
+        ], ignore_conflicts=True)
+        queued = dict(AttendanceSyncSheet.objects.filter(
+            submitted_by=request.user, idempotency_key__in=new_keys, status=AttendanceSyncSheet.PENDING
+        ).values_list('idempotency_key', 'id'))
+
+        if queued:
+            sheet_ids = list(queued.values())
+            transaction.on_commit(lambda: ingest_attendance_sheets.delay(sheet_ids))
+
+        data = [
+            {"key": k, "status": known[k]['status'], "duplicate": True} if k in known
+            else {"key": k, "status": AttendanceSyncSheet.PENDING, "duplicate": False}
+            for k in incoming
+        ] + list(rejected.values())
+        return Response({"message": "Sheets accepted", "sheets": data}, status=status.HTTP_202_ACCEPTED)
+
+
+class Echo:
+    """File-like object whose write() hands the line straight back, so csv.writer can feed a generator."""
+    def write(self, value):
+        return value
+
+
+class AttendanceExportAPIView(APIView):
+    """
+    Admin: streams an attendance register as CSV without building it in memory.
+    `layout=long` (default) writes one line per report; `layout=matrix` writes
+    students x class dates for one subject.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    chunk_size = 2000
+
+    def get(self, request):
+        if str(request.user.user_type) != '1':
+            return Response({"detail": "Forbidden: Admin access only."}, status=status.HTTP_403_FORBIDDEN)
+
+        params = request.query_params
+        session_id = params.get("session_year_id")
+        subject_id = params.get("subject_id")
+        course_id = params.get("course_id")
+        layout = params.get("layout", "long")
+
+        if not session_id:
+            return Response({"error": "session_year_id is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if layout == "matrix" and not subject_id:
+            return Response({"error": "The matrix layout needs a subject_id"}, status=status.HTTP_400_BAD_REQUEST)
+
+        reports = AttendanceReport.objects.filter(attendance_id__session_year_id=session_id)
+        if subject_id:
+            reports = reports.filter(attendance_id__subject_id=subject_id)
+        if course_id:
+            reports = reports.filter(attendance_id__subject_id__course_id=course_id)
+
+        writer = csv.writer(Echo())
+        if layout == "matrix":
+            rows = self._matrix_rows(writer, reports)
+        else:
+            rows = self._long_rows(writer, reports)
+
+        response = StreamingHttpResponse(rows, content_type="text/csv")
+        response["Content-Disposition"] = f'attachment; filename="attendance_{session_id}_{layout}.csv"'
+        return response
+
+    def _long_rows(self, writer, reports):
+        reports = reports.select_related(
+            'student_id__admin', 'attendance_id', 'attendance_id__subject_id'
+        ).order_by('attendance_id__attendance_date', 'attendance_id__subject_id', 'student_id')
+
+        yield writer.writerow(["date", "subject", "student_id", "email", "name", "status"])
+        for r in reports.iterator(chunk_size=self.chunk_size):
+            admin = r.student_id.admin
+            yield writer.writerow([
+                r.attendance_id.attendance_date,
+                r.attendance_id.subject_id.subject_name,
+                admin.id,
+                admin.email,
+                f"{admin.first_name} {admin.last_name}",
+                "P" if r.status else "A",
+            ])
+
+    def _matrix_rows(self, writer, reports):
+        dates = list(reports.values_list('attendance_id__attendance_date', flat=True).distinct().order_by('attendance_id__attendance_date'))
+        column_of = {d: i for i, d in enumerate(dates)}
+        reports = reports.select_related('student_id__admin', 'attendance_id').order_by('student_id', 'attendance_id__attendance_date')
+
+        yield writer.writerow(["student_id", "email", "name"] + [d.isoformat() for d in dates])
+
+        # Reports arrive grouped by student, so only one row is ever held in memory
+        current, cells = None, None
+        for r in reports.iterator(chunk_size=self.chunk_size):
+            admin = r.student_id.admin
+            if current is None or current.id != admin.id:
+                if current is not None:
+                    yield writer.writerow([current.id, current.email, f"{current.first_name} {current.last_name}"] + cells)
+                current, cells = admin, [""] * len(dates)
+            cells[column_of[r.attendance_id.attendance_date]] = "P" if r.status else "A"
+        if current is not None:
+            yield writer.writerow([current.id, current.email, f"{current.first_name} {current.last_name}"] + cells)
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'app.core'
+
+    def ready(self):
+        from .dashboard import connect_signals
+        connect_signals()
@@ -0,0 +1,68 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from channels.middleware import BaseMiddleware
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .realtime import role_group, user_group
+
+
+@database_sync_to_async
+def _user_for_token(raw_token):
+    try:
+        token = AccessToken(raw_token)
+    except TokenError:
+        return AnonymousUser()
+    user = get_user_model().objects.filter(
+        **{api_settings.USER_ID_FIELD: token[api_settings.USER_ID_CLAIM]}, is_active=True
+    ).first()
+    return user or AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Authenticates a WebSocket from the same access token the REST API uses. Browsers cannot
+    set headers on a WebSocket handshake, so the token travels as ?token=<access token>.
+    """
+
+    async def __call__(self, scope, receive, send):
+        token = parse_qs(scope.get('query_string', b'').decode()).get('token', [None])[0]
+        scope['user'] = await _user_for_token(token) if token else AnonymousUser()
+        return await super().__call__(scope, receive, send)
+
+
+class EventsConsumer(AsyncJsonWebsocketConsumer):
+    """
+    One socket per browser tab. It joins the user's own group and their role's group,
+    relays every realtime.event sent to those groups, and answers {"type": "ping"}.
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if not user or not user.is_authenticated:
+            # Closing before accept() rejects the handshake with an HTTP 403 and the browser only
+            # sees 1006, so accept first for the client to receive 4401 and stop reconnecting
+            await self.accept()
+            await self.close(code=4401)
+            return
+
+        self.groups_joined = [user_group(user.id), role_group(user.user_type)]
+        for group in self.groups_joined:
+            await self.channel_layer.group_add(group, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        for group in getattr(self, 'groups_joined', []):
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        if content.get('type') == 'ping':
+            await self.send_json({"type": "pong"})
+
+    async def realtime_event(self, event):
+        await self.send_json({"type": event["event"], "data": event["data"]})
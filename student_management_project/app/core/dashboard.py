@@ -0,0 +1,154 @@
+"""
+Cached snapshot of the admin dashboard.
+
+Each card and chart is its own cache entry, computed on its own and stored with the time it
+was computed. Saving or deleting a row only invalidates the entries that read its table (see
+INVALIDATED_BY), by bumping that entry's version so any older value, including one still being
+computed when the write happened, is never read again. A cold entry is computed by one caller
+at a time: the others wait briefly for that result instead of running the same query.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from app.accounts.models import Staffs, Students
+from app.curriculum.models import Courses, Subjects
+from app.operations.models import FeedBackStaffs, FeedBackStudent, StudentResult
+from .models import ContactMessage
+
+CACHE_TIMEOUT = 60 * 60
+# How long a computing caller holds an entry's lock, and how long the others wait for it
+LOCK_TIMEOUT = 30
+WAIT_TIMEOUT = 5
+POLL_INTERVAL = 0.05
+
+ENTRIES = {
+    'total_students': lambda: Students.objects.count(),
+    'total_staffs': lambda: Staffs.objects.count(),
+    'total_courses': lambda: Courses.objects.count(),
+    'total_subjects': lambda: Subjects.objects.count(),
+    'total_feedback': lambda: FeedBackStudent.objects.count() + FeedBackStaffs.objects.count(),
+    'total_contacts': lambda: ContactMessage.objects.count(),
+    'subjects_per_course': lambda: list(
+        Courses.objects.annotate(value=Count('subjects')).values('course_name', 'value')
+    ),
+    'students_per_course': lambda: list(
+        Courses.objects.annotate(value=Count('students')).values('course_name', 'value')
+    ),
+    'students_per_subject': lambda: list(
+        Subjects.objects.annotate(value=Count('studentresult__student_id', distinct=True)).values('subject_name', 'value')
+    ),
+}
+
+INVALIDATED_BY = {
+    Students: ('total_students', 'students_per_course'),
+    Staffs: ('total_staffs',),
+    Courses: ('total_courses', 'subjects_per_course', 'students_per_course'),
+    Subjects: ('total_subjects', 'subjects_per_course', 'students_per_subject'),
+    FeedBackStudent: ('total_feedback',),
+    FeedBackStaffs: ('total_feedback',),
+    ContactMessage: ('total_contacts',),
+    StudentResult: ('students_per_subject',),
+}
+# Totals only move when a row is added or deleted, so edits leave them cached
+TOTALS = {name for name in ENTRIES if name.startswith('total_')}
+
+
+def _version_key(name):
+    return f"dashboard:{name}:version"
+
+
+def _entry_key(name, version):
+    return f"dashboard:{name}:v{version}"
+
+
+def _versions(names):
+    versions = cache.get_many([_version_key(name) for name in names])
+    result = {}
+    for name in names:
+        version = versions.get(_version_key(name))
+        if version is None:
+            # Starting from the clock rather than 1 means an entry left over from before the
+            # version key was evicted can never be mistaken for a current one
+            cache.add(_version_key(name), time.time_ns(), None)
+            version = cache.get(_version_key(name))
+        result[name] = version
+    return result
+
+
+def _compute(name, key):
+    """Computes one entry under its lock; callers that lose the lock wait for the winner's value."""
+    lock_key = f"{key}:lock"
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        if time.monotonic() > deadline:
+            # The computing caller is stuck or gone; answer this request without the cache
+            return ENTRIES[name](), timezone.now()
+        time.sleep(POLL_INTERVAL)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    try:
+        # Another caller may have finished between our miss and taking the lock
+        cached = cache.get(key)
+        if cached is None:
+            cached = (ENTRIES[name](), timezone.now())
+            cache.set(key, cached, CACHE_TIMEOUT)
+        return cached
+    finally:
+        cache.delete(lock_key)
+
+
+def get_snapshot():
+    """
+    Every dashboard entry as {name: value}, plus `last_updated`: when the most recently
+    refreshed entry was computed (an ISO timestamp).
+    """
+    versions = _versions(list(ENTRIES))
+    keys = {name: _entry_key(name, version) for name, version in versions.items()}
+    cached = cache.get_many(list(keys.values()))
+
+    snapshot = {}
+    computed_at = []
+    for name, key in keys.items():
+        value, at = cached.get(key) or _compute(name, key)
+        snapshot[name] = value
+        computed_at.append(at)
+    snapshot['last_updated'] = max(computed_at).isoformat()
+    return snapshot
+
+
+def invalidate(names):
+    """Drops the given entries once the current transaction commits."""
+    if not names:
+        return
+
+    def bump():
+        for name in names:
+            try:
+                cache.incr(_version_key(name))
+            except ValueError:
+                # Evicted or never read; the next read starts a fresh version
+                pass
+    transaction.on_commit(bump)
+
+
+def _invalidate_saved(sender, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    names = INVALIDATED_BY[sender]
+    invalidate(names if created else [name for name in names if name not in TOTALS])
+
+
+def _invalidate_deleted(sender, **kwargs):
+    invalidate(INVALIDATED_BY[sender])
+
+
+def connect_signals():
+    for model in INVALIDATED_BY:
+        post_save.connect(_invalidate_saved, sender=model, dispatch_uid=f'dashboard_saved_{model.__name__}')
+        post_delete.connect(_invalidate_deleted, sender=model, dispatch_uid=f'dashboard_deleted_{model.__name__}')
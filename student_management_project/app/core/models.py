@@ -17,4 +17,10 @@ class ContactMessage(models.Model):
     email = models.EmailField()
     subject = models.CharField(max_length=255)
     message = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    created_at = models.DateTimeField(auto_now_add=True)
+
+class JobWatermark(models.Model):
+    """Remembers how far a periodic job has processed, so the next run only looks at newer rows."""
+    name = models.CharField(max_length=100, unique=True)
+    watermark = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,103 @@
+import base64
+import datetime
+import json
+
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if isinstance(v, (datetime.date, datetime.datetime)) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor, size):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("Invalid cursor")
+    return values
+
+
+def page_params(request):
+    """Reads `cursor` and a clamped `page_size` from the query string."""
+    try:
+        page_size = int(request.query_params.get('page_size', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        page_size = DEFAULT_PAGE_SIZE
+    return request.query_params.get('cursor'), max(1, min(page_size, MAX_PAGE_SIZE))
+
+
+def _value(row, field):
+    if isinstance(row, dict):
+        return row[field]
+    for part in field.split('__'):
+        row = getattr(row, part)
+    return row
+
+
+def _seek(fields, values, descending):
+    """Q matching the rows that sort after `values` on `fields`."""
+    op = 'lt' if descending else 'gt'
+    seek = Q()
+    for i, field in enumerate(fields):
+        step = Q(**{f'{field}__{op}': values[i]})
+        for prev, prev_value in zip(fields[:i], values[:i]):
+            step &= Q(**{prev: prev_value})
+        seek |= step
+    return seek
+
+
+def keyset_page(queryset, fields, cursor=None, page_size=DEFAULT_PAGE_SIZE, descending=False, after_window=None):
+    """
+    Returns (rows, next_cursor) for a queryset ordered by `fields`, seeking past `cursor`
+    with a WHERE on the sort key instead of an OFFSET. The last field must be unique (usually id).
+
+    For querysets with window annotations pass `after_window`, a never-true Q on a window
+    annotation; OR-ing it in makes Django apply the seek after the windows are computed,
+    so a page boundary never changes ranks.
+    """
+    if cursor:
+        seek = _seek(fields, decode_cursor(cursor, len(fields)), descending)
+        if after_window is not None:
+            seek |= after_window
+        queryset = queryset.filter(seek)
+
+    ordering = [f'-{f}' if descending else f for f in fields]
+    rows = list(queryset.order_by(*ordering)[:page_size + 1])
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor([_value(rows[-1], f) for f in fields])
+    return rows, next_cursor
+
+
+def keyset_union_page(querysets, fields, cursor=None, page_size=DEFAULT_PAGE_SIZE, descending=False):
+    """
+    keyset_page() over a UNION ALL of `querysets`, which must be values() querysets with the
+    same columns. A combined query cannot be filtered, so the seek is applied to each branch
+    before the union. `fields` must be unique across all branches (e.g. end with a constant
+    per-branch annotation and the id).
+    """
+    if cursor:
+        seek = _seek(fields, decode_cursor(cursor, len(fields)), descending)
+        querysets = [qs.filter(seek) for qs in querysets]
+
+    combined = querysets[0].union(*querysets[1:], all=True)
+    ordering = [f'-{f}' if descending else f for f in fields]
+    rows = list(combined.order_by(*ordering)[:page_size + 1])
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor([_value(rows[-1], f) for f in fields])
+    return rows, next_cursor
@@ -0,0 +1,52 @@
+"""
+Server-to-browser push over Django Channels.
+
+Every connected socket joins its user's group and its role's group (see consumers.py).
+Writes call push() with (group, event, data) triples; the events are sent once the
+surrounding transaction commits, so clients never hear about rows that were rolled back.
+Writes that reach many users push to a role group rather than to each user's group.
+A push that fails (e.g. Redis is down) is logged and never fails the write itself.
+"""
+import asyncio
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+ROLE_NAMES = {'1': 'admin', '2': 'staff', '3': 'student'}
+
+
+def user_group(user_id):
+    return f"user.{user_id}"
+
+
+def role_group(user_type):
+    return f"role.{ROLE_NAMES.get(str(user_type), 'other')}"
+
+
+def _send(events):
+    layer = get_channel_layer()
+    if layer is None:
+        return
+
+    async def send_all():
+        # Sent concurrently, so a push to many groups costs about one round trip, not one per group
+        await asyncio.gather(*(
+            layer.group_send(group, {"type": "realtime.event", "event": event, "data": data})
+            for group, event, data in events
+        ))
+
+    try:
+        async_to_sync(send_all)()
+    except Exception:
+        logger.exception("Could not push %d realtime event(s)", len(events))
+
+
+def push(events):
+    """Sends an iterable of (group, event, data) after the current transaction commits."""
+    events = list(events)
+    if events:
+        transaction.on_commit(lambda: _send(events))
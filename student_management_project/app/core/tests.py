@@ -1,3 +1,47 @@
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from app.curriculum.models import Courses
+from . import dashboard
+from .models import ContactMessage
+
+
+class DashboardSnapshotTests(TestCase):
+    """The snapshot is served from the cache and only the entries a write touches are recomputed."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_a_warm_snapshot_runs_no_queries(self):
+        dashboard.get_snapshot()
+        with self.assertNumQueries(0):
+            dashboard.get_snapshot()
+
+    def test_a_new_row_recomputes_only_the_entries_that_read_its_table(self):
+        before = dashboard.get_snapshot()
+        with self.captureOnCommitCallbacks(execute=True):
+            Courses.objects.create(course_name='Dashboard Course')
+        # total_courses, subjects_per_course and students_per_course
+        with self.assertNumQueries(3):
+            after = dashboard.get_snapshot()
+        self.assertEqual(after['total_courses'], before['total_courses'] + 1)
+        self.assertGreater(after['last_updated'], before['last_updated'])
+
+    def test_editing_a_row_keeps_the_totals_cached(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            message = ContactMessage.objects.create(name='n', email='n@example.com', subject='s', message='m')
+        self.assertEqual(dashboard.get_snapshot()['total_contacts'], 1)
+        message.message = 'edited'
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            message.save()
+        self.assertEqual(callbacks, [])
+        with self.assertNumQueries(0):
+            dashboard.get_snapshot()
+
+    def test_a_value_computed_before_an_invalidation_is_never_served(self):
+        version = dashboard._versions(['total_courses'])['total_courses']
+        with self.captureOnCommitCallbacks(execute=True):
+            Courses.objects.create(course_name='Dashboard Course')
+        # A reader that started before the write stores its stale result under the old version
+        cache.set(dashboard._entry_key('total_courses', version), (0, None))
+        self.assertEqual(dashboard.get_snapshot()['total_courses'], 1)
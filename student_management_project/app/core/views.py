@@ -1,16 +1,8 @@
-from django.db.models import Count
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import permissions, status
 
-from app.accounts.models import Students, Staffs
-from app.curriculum.models import Courses, Subjects
-from app.operations.models import (
-    FeedBackStudent, 
-    FeedBackStaffs, 
-   
-)
-from .models import ContactMessage
+from .dashboard import get_snapshot
 
 class AdminDashboardStats(APIView):
     
@@ -18,49 +10,30 @@ class AdminDashboardStats(APIView):
 
     def get(self, request):
         try:
-            student_count = Students.objects.count()
-            staff_count = Staffs.objects.count()
-            course_count = Courses.objects.count()
-            subject_count = Subjects.objects.count()
-            staff_student_chart = [
-                {"name": "Students", "value": student_count},
-                {"name": "Staffs", "value": staff_count}
-            ]
-
-            course_subject_distribution = list(Courses.objects.annotate(
-                value=Count('subjects')
-            ).values('course_name', 'value'))
-
-            # Total Student in Each Course
-            course_student_distribution = list(Courses.objects.annotate(
-                value=Count('students')
-            ).values('course_name', 'value'))
-
-            # Total Students in Each Subject
-            subject_student_distribution = list(Subjects.objects.annotate(
-                value=Count('studentresult__student_id', distinct=True)
-            ).values('subject_name', 'value'))
-
+            snapshot = get_snapshot()
             return Response({
                 "cards": {
-                    "total_students": student_count,
-                    "total_staffs": staff_count,
-                    "total_courses": course_count,
-                    "total_subjects": subject_count,
-                    "total_feedback": FeedBackStudent.objects.count() + FeedBackStaffs.objects.count(),
-                    "total_contacts": ContactMessage.objects.count(),
+                    "total_students": snapshot['total_students'],
+                    "total_staffs": snapshot['total_staffs'],
+                    "total_courses": snapshot['total_courses'],
+                    "total_subjects": snapshot['total_subjects'],
+                    "total_feedback": snapshot['total_feedback'],
+                    "total_contacts": snapshot['total_contacts'],
                 },
                 "charts": {
-                    "staff_student_ratio": staff_student_chart,
-                    "subjects_per_course": course_subject_distribution,
-                    "students_per_course": course_student_distribution,
-                    "students_per_subject": subject_student_distribution
+                    "staff_student_ratio": [
+                        {"name": "Students", "value": snapshot['total_students']},
+                        {"name": "Staffs", "value": snapshot['total_staffs']}
+                    ],
+                    "subjects_per_course": snapshot['subjects_per_course'],
+                    "students_per_course": snapshot['students_per_course'],
+                    "students_per_subject": snapshot['students_per_subject']
                 },
-                "last_updated": "400" 
+                "last_updated": snapshot['last_updated']
             }, status=status.HTTP_200_OK)
 
         except Exception as e:
             return Response(
                 {"error": f"Dashboard Error: {str(e)}"}, 
                 status=status.HTTP_400_BAD_REQUEST
-            )
\ No newline at end of file
+            )
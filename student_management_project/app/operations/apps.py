@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class OperationsConfig(AppConfig):
     name = 'app.operations'
+
+    def ready(self):
+        from .search import connect_signals
+        connect_signals()
@@ -0,0 +1,137 @@
+import math
+import time
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, FloatField, Max, Min, OuterRef, Q, StdDev, Subquery, Sum, Window
+from django.db.models.functions import Cast, Coalesce, Floor, PercentRank, RowNumber
+
+from app.curriculum.models import Subjects
+from .models import StudentResult
+
+FIELDS = {
+    'exam': F('subject_exam_marks'),
+    'assignment': F('subject_assignment_marks'),
+    'total': F('subject_exam_marks') + F('subject_assignment_marks'),
+}
+PERCENTILES = (10, 25, 50, 75, 90)
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+# Never true (ranks start at 1). OR-ing a filter with it moves that filter after the window
+# functions, so it narrows the rows returned without shrinking the partitions being ranked.
+AFTER_RANKING = Q(rank__lt=1)
+
+
+def ranked_results(results, field='total'):
+    """Annotates each result with its rank and percentile among all results of the same subject."""
+    score = FIELDS[field]
+    return results.annotate(
+        score=score,
+        rank=Window(RowNumber(), partition_by=[F('subject_id')], order_by=[score.desc(), F('id').asc()]),
+        percentile=Window(PercentRank(), partition_by=[F('subject_id')], order_by=score.asc()),
+    )
+
+
+def ranked_course_totals(students, field='total'):
+    """
+    Annotates students with their summed score over their course's subjects, plus rank and
+    percentile within the course. The total is a correlated subquery rather than a GROUP BY,
+    because window functions cannot be ordered by an aggregate of the same query here.
+    """
+    totals = StudentResult.objects.filter(
+        student_id=OuterRef('pk'), subject_id__course_id=OuterRef('course_id')
+    ).values('student_id').annotate(total=Sum(FIELDS[field])).values('total')
+    score = Coalesce(Subquery(totals), 0.0)
+    return students.annotate(
+        score=score,
+        rank=Window(RowNumber(), partition_by=[F('course_id')], order_by=[score.desc(), F('id').asc()]),
+        percentile=Window(PercentRank(), partition_by=[F('course_id')], order_by=score.asc()),
+    )
+
+
+def _version_key(scope, scope_id):
+    return f"gradebook:{scope}:{scope_id}:version"
+
+
+def _cache_key(scope, scope_id, field, bucket):
+    # The version is bumped on every marks save, which orphans every older entry at once.
+    # It starts from the clock rather than 1, so if the version key is evicted, entries cached
+    # under the old version can never be mistaken for current ones.
+    version = cache.get_or_set(_version_key(scope, scope_id), time.time_ns, None)
+    return f"gradebook:{scope}:{scope_id}:v{version}:{field}:{bucket:g}"
+
+
+def _percentile(ordered, pct):
+    """Linear interpolation between closest ranks, the same rule as numpy.percentile's default."""
+    if not ordered:
+        return None
+    pos = (len(ordered) - 1) * pct / 100
+    low, high = math.floor(pos), math.ceil(pos)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+def _score_queryset(scope, scope_id, field):
+    """One row per scored item: a result for a subject, or a student's summed total for a course."""
+    if scope == 'subject':
+        return StudentResult.objects.filter(subject_id=scope_id).annotate(score=FIELDS[field])
+    return StudentResult.objects.filter(subject_id__course_id=scope_id).values('student_id').annotate(
+        score=Sum(FIELDS[field])
+    ).order_by()
+
+
+def compute_stats(scope, scope_id, field='total', bucket=10):
+    """
+    Count, mean, spread and extremes are aggregated in the database (over a grouped
+    subquery for course totals). Percentiles need the ordered scores, which come from one
+    values_list fetch that also feeds the course histogram.
+    """
+    scores = _score_queryset(scope, scope_id, field)
+    summary = scores.aggregate(
+        count=Count('score'), mean=Avg('score'), std_dev=StdDev('score'),
+        minimum=Min('score'), maximum=Max('score'),
+    )
+    ordered = sorted(scores.values_list('score', flat=True))
+
+    if scope == 'subject':
+        rows = scores.annotate(
+            bucket=Floor(Cast('score', FloatField()) / bucket)
+        ).values('bucket').annotate(count=Count('id')).order_by('bucket')
+        buckets = {int(row['bucket']): row['count'] for row in rows}
+    else:
+        buckets = {}
+        for score in ordered:
+            key = math.floor(score / bucket)
+            buckets[key] = buckets.get(key, 0) + 1
+    histogram = [{"from": k * bucket, "to": (k + 1) * bucket, "count": n} for k, n in sorted(buckets.items())]
+
+    return {
+        "scope": scope,
+        "scope_id": int(scope_id),
+        "field": field,
+        **summary,
+        "median": _percentile(ordered, 50),
+        "percentiles": {f"p{p}": _percentile(ordered, p) for p in PERCENTILES},
+        "histogram": histogram,
+    }
+
+
+def get_stats(scope, scope_id, field='total', bucket=10):
+    """Cached compute_stats(); entries are invalidated by invalidate_subjects() when marks change."""
+    key = _cache_key(scope, scope_id, field, bucket)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_stats(scope, scope_id, field, bucket)
+        cache.set(key, stats, CACHE_TIMEOUT)
+    return stats
+
+
+def invalidate_subjects(subject_ids):
+    """Invalidates cached stats for the given subjects and the courses they belong to."""
+    course_ids = set(Subjects.objects.filter(id__in=subject_ids).values_list('course_id', flat=True))
+    for scope, ids in (('subject', subject_ids), ('course', course_ids)):
+        for scope_id in ids:
+            try:
+                cache.incr(_version_key(scope, scope_id))
+            except ValueError:
+                # Nothing cached for this scope, or the version was evicted; the next read starts a fresh one
+                pass
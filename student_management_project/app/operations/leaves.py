@@ -0,0 +1,74 @@
+"""
+Leave periods: overlap queries and the per-day calendar.
+
+A leave covers leave_date..leave_end_date, both inclusive. Migration 0017 indexes that period
+(a GiST index over daterange() on PostgreSQL, a btree on (end, start) elsewhere), and
+overlapping() is written so each backend's query can use its index.
+"""
+import calendar
+import datetime
+
+from django.contrib.postgres.fields import DateRangeField
+from django.db import connection
+from django.db.models import F, Func, Value
+from django.db.models.functions import Concat
+
+from .models import LeaveReportStaff, LeaveReportStudent
+
+# Rejected leaves never block a day
+ACTIVE_STATUSES = (0, 1)
+
+# kind -> (model, owner field)
+LEAVE_KINDS = {
+    'staff': (LeaveReportStaff, 'staff_id'),
+    'student': (LeaveReportStudent, 'student_id'),
+}
+
+
+def overlapping(queryset, start, end):
+    """Narrows `queryset` to the leaves sharing at least one day with start..end (inclusive)."""
+    if connection.vendor == 'postgresql':
+        from django.db.backends.postgresql.psycopg_any import DateRange
+
+        # Must stay identical to the indexed expression in migration 0017
+        period = Func(F('leave_date'), F('leave_end_date'), Value('[]'), function='daterange', output_field=DateRangeField())
+        return queryset.alias(period=period).filter(period__overlap=DateRange(start, end, '[]'))
+    return queryset.filter(leave_end_date__gte=start, leave_date__lte=end)
+
+
+def active_leaves(kind, start, end):
+    """
+    Pending and approved leaves of `kind` overlapping start..end, as dicts with the owner's
+    user id and name, ordered by start date.
+    """
+    model, owner = LEAVE_KINDS[kind]
+    leaves = overlapping(model.objects.filter(leave_status__in=ACTIVE_STATUSES), start, end)
+    return list(leaves.values(
+        'id', 'leave_date', 'leave_end_date', 'leave_status', 'leave_message',
+        user_id=F(f'{owner}__admin_id'),
+        name=Concat(F(f'{owner}__admin__first_name'), Value(' '), F(f'{owner}__admin__last_name')),
+    ).order_by('leave_date', 'id'))
+
+
+def month_calendar(kind, year, month):
+    """
+    Who is on leave on each day of a month: one overlap query for the month, expanded to
+    [{"date", "count", "people": [...]}] with a row for every day, including empty ones.
+    """
+    first = datetime.date(year, month, 1)
+    last = first.replace(day=calendar.monthrange(year, month)[1])
+    days = {first + datetime.timedelta(days=n): [] for n in range(last.day)}
+
+    for leave in active_leaves(kind, first, last):
+        person = {
+            "leave_id": leave['id'],
+            "user_id": leave['user_id'],
+            "name": leave['name'].strip(),
+            "leave_status": leave['leave_status'],
+        }
+        day = max(leave['leave_date'], first)
+        while day <= min(leave['leave_end_date'], last):
+            days[day].append(person)
+            day += datetime.timedelta(days=1)
+
+    return [{"date": str(day), "count": len(people), "people": people} for day, people in days.items()]
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from app.operations.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text search documents from feedback, leave and contact messages."
+
+    def handle(self, *args, **options):
+        count = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} search documents"))
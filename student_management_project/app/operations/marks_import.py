@@ -0,0 +1,152 @@
+"""
+CSV marks import. The file is read row by row and handled in chunks: each chunk costs two
+student lookups (by id and by email) and one save_subject_marks() transaction, so memory
+and query count depend on the chunk size rather than the file size.
+
+Expected columns: student (id or email), subject (id or name), exam, assignment.
+A blank exam or assignment cell leaves that mark unchanged.
+"""
+import csv
+import io
+
+from app.accounts.models import Students
+from app.curriculum.models import Subjects
+from .services import ASSIGNMENT, EXAM, save_subject_marks
+
+CHUNK_SIZE = 2000
+MAX_ERRORS = 1000
+REQUIRED_COLUMNS = {'student', 'subject'}
+
+
+class ImportReport:
+    """Row counts and per-line errors for one import."""
+    def __init__(self):
+        self.rows = 0
+        self.saved = 0
+        self.error_count = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.error_count += 1
+        # Only the first errors are kept so a badly broken file cannot grow the response unboundedly
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "saved": self.saved,
+            "failed": self.error_count,
+            "errors": self.errors,
+            "errors_truncated": self.error_count > len(self.errors),
+        }
+
+
+def _subject_index(staff_user=None):
+    """
+    Returns (by_id, by_name): subject ids map to (subject_id, course_id), and lowercased names
+    map to {course_id: subject_id}, since different courses may share a subject name.
+    Subjects are few enough to load once.
+    """
+    subjects = Subjects.objects.all()
+    if staff_user is not None:
+        subjects = subjects.filter(staff_id=staff_user)
+    by_id, by_name = {}, {}
+    for subject_id, name, course_id in subjects.values_list('id', 'subject_name', 'course_id'):
+        by_id[str(subject_id)] = (subject_id, course_id)
+        by_name.setdefault(name.strip().lower(), {})[course_id] = subject_id
+    return by_id, by_name
+
+
+def _resolve_subject(subjects, value, course_id):
+    """Finds the subject a row names (by id, or by name within the student's course) as its id."""
+    by_id, by_name = subjects
+    value = (value or '').strip()
+    if value.isdigit() and value in by_id:
+        subject_id, subject_course_id = by_id[value]
+    elif value.lower() in by_name:
+        courses = by_name[value.lower()]
+        subject_id, subject_course_id = courses.get(course_id), course_id
+        if subject_id is None:
+            raise ValueError("Subject is not part of the student's course")
+    else:
+        raise ValueError(f"Unknown subject '{value}'")
+    if subject_course_id != course_id:
+        raise ValueError("Subject is not part of the student's course")
+    return subject_id
+
+
+def _parse_marks(row):
+    fields = {}
+    for column, field in (('exam', EXAM), ('assignment', ASSIGNMENT)):
+        value = (row.get(column) or '').strip()
+        if value:
+            try:
+                fields[field] = float(value)
+            except ValueError:
+                raise ValueError(f"Invalid {column} marks '{value}'")
+    if not fields:
+        raise ValueError("Row has no exam or assignment marks")
+    return fields
+
+
+def _import_chunk(chunk, subjects, report):
+    """Resolves one chunk of (line, row) pairs and saves the valid ones."""
+    keys = [(row.get('student') or '').strip() for _, row in chunk]
+    ids = {key for key in keys if key.isdigit()}
+    emails = {key for key in keys if key and not key.isdigit()}
+
+    students = {}
+    for student_id, course_id in Students.objects.filter(id__in=ids).values_list('id', 'course_id'):
+        students[str(student_id)] = (student_id, course_id)
+    for student_id, email, course_id in Students.objects.filter(
+        admin__email__in=emails | {email.lower() for email in emails}
+    ).values_list('id', 'admin__email', 'course_id'):
+        students[email.lower()] = (student_id, course_id)
+
+    rows = {}
+    for (line, row), key in zip(chunk, keys):
+        try:
+            student = students.get(key if key.isdigit() else key.lower())
+            if student is None:
+                raise ValueError(f"Unknown student '{key}'")
+            subject_id = _resolve_subject(subjects, row.get('subject'), student[1])
+            fields = _parse_marks(row)
+        except ValueError as e:
+            report.error(line, str(e))
+            continue
+        # A later row for the same student and subject overrides the fields it supplies
+        rows.setdefault((student[0], subject_id), {}).update(fields)
+
+    if rows:
+        report.saved += save_subject_marks(rows)
+
+
+def import_marks_csv(uploaded_file, staff_user=None, chunk_size=CHUNK_SIZE):
+    """
+    Imports marks from an uploaded CSV file. When `staff_user` is given, only that staff
+    member's subjects are accepted. Returns an ImportReport.
+    """
+    reader = csv.DictReader(io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline=''))
+    columns = {name.strip().lower() for name in reader.fieldnames or []}
+    missing = REQUIRED_COLUMNS - columns
+    if missing:
+        raise ValueError(f"CSV is missing column(s): {', '.join(sorted(missing))}")
+
+    subjects = _subject_index(staff_user)
+    report = ImportReport()
+    chunk = []
+    try:
+        for row in reader:
+            report.rows += 1
+            row = {(k or '').strip().lower(): v for k, v in row.items()}
+            chunk.append((reader.line_num, row))
+            if len(chunk) == chunk_size:
+                _import_chunk(chunk, subjects, report)
+                chunk = []
+    except (csv.Error, UnicodeDecodeError) as e:
+        # Earlier chunks are already saved; stop at the unreadable line and report it
+        report.error(reader.line_num + 1, f"Could not read file: {e}")
+    if chunk:
+        _import_chunk(chunk, subjects, report)
+    return report
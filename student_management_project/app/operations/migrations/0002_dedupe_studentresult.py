@@ -0,0 +1,26 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:00
+
+from django.db import migrations, models
+
+
+def dedupe_results(apps, schema_editor):
+    """Keeps the newest result per (student, subject) so unique_student_result can be added."""
+    StudentResult = apps.get_model('operations', 'StudentResult')
+    duplicates = StudentResult.objects.values('student_id', 'subject_id').annotate(
+        keep=models.Max('id'), n=models.Count('id')
+    ).filter(n__gt=1).order_by()
+    for row in duplicates.iterator():
+        StudentResult.objects.filter(
+            student_id=row['student_id'], subject_id=row['subject_id']
+        ).exclude(id=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_results, migrations.RunPython.noop),
+    ]
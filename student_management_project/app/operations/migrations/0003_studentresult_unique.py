@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_customuser_gender'),
+        ('curriculum', '0001_initial'),
+        ('operations', '0002_dedupe_studentresult'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='studentresult',
+            constraint=models.UniqueConstraint(fields=('student_id', 'subject_id'), name='unique_student_result'),
+        ),
+    ]
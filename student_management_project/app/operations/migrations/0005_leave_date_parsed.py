@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0004_reportcardjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leavereportstaff',
+            name='leave_date_parsed',
+            field=models.DateField(null=True),
+        ),
+        migrations.AddField(
+            model_name='leavereportstudent',
+            name='leave_date_parsed',
+            field=models.DateField(null=True),
+        ),
+    ]
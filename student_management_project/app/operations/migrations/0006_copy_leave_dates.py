@@ -0,0 +1,50 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:00
+
+import datetime
+
+from django.db import migrations
+from django.utils.dateparse import parse_date, parse_datetime
+
+# Besides ISO dates (what the leave forms' date inputs send), formats seen in hand-entered rows
+FALLBACK_FORMATS = ('%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%B %d, %Y', '%d %B %Y')
+
+
+def _parse_leave_date(value, created_at):
+    """Parses a legacy CharField leave date; unreadable values fall back to the day the leave was filed."""
+    value = (value or '').strip()
+    try:
+        parsed = parse_date(value) or parse_datetime(value)
+    except ValueError:
+        parsed = None
+    if parsed:
+        return parsed.date() if isinstance(parsed, datetime.datetime) else parsed
+    for fmt in FALLBACK_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, fmt).date()
+        except ValueError:
+            pass
+    return created_at.date()
+
+
+def copy_leave_dates(apps, schema_editor):
+    for model_name in ('LeaveReportStudent', 'LeaveReportStaff'):
+        model = apps.get_model('operations', model_name)
+        batch = []
+        for leave in model.objects.only('id', 'leave_date', 'created_at').iterator(chunk_size=2000):
+            leave.leave_date_parsed = _parse_leave_date(leave.leave_date, leave.created_at)
+            batch.append(leave)
+            if len(batch) == 2000:
+                model.objects.bulk_update(batch, ['leave_date_parsed'])
+                batch = []
+        model.objects.bulk_update(batch, ['leave_date_parsed'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0005_leave_date_parsed'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_leave_dates, migrations.RunPython.noop),
+    ]
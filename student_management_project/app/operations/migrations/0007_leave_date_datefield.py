@@ -0,0 +1,49 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0006_copy_leave_dates'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='leavereportstaff',
+            name='leave_date',
+        ),
+        migrations.RemoveField(
+            model_name='leavereportstudent',
+            name='leave_date',
+        ),
+        migrations.RenameField(
+            model_name='leavereportstaff',
+            old_name='leave_date_parsed',
+            new_name='leave_date',
+        ),
+        migrations.RenameField(
+            model_name='leavereportstudent',
+            old_name='leave_date_parsed',
+            new_name='leave_date',
+        ),
+        migrations.AlterField(
+            model_name='leavereportstaff',
+            name='leave_date',
+            field=models.DateField(),
+        ),
+        migrations.AlterField(
+            model_name='leavereportstudent',
+            name='leave_date',
+            field=models.DateField(),
+        ),
+        migrations.AddIndex(
+            model_name='leavereportstaff',
+            index=models.Index(fields=['leave_status', 'created_at'], name='leave_staff_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leavereportstudent',
+            index=models.Index(fields=['leave_status', 'created_at'], name='leave_student_status_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_customuser_gender'),
+        ('operations', '0007_leave_date_datefield'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feedbackstaffs',
+            index=models.Index(fields=['created_at', 'id'], name='feedback_staff_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedbackstaffs',
+            index=models.Index(condition=models.Q(('feedback_reply', '')), fields=['created_at', 'id'], name='feedback_staff_unreplied_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedbackstudent',
+            index=models.Index(fields=['created_at', 'id'], name='feedback_student_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedbackstudent',
+            index=models.Index(condition=models.Q(('feedback_reply', '')), fields=['created_at', 'id'], name='feedback_student_unreplied_idx'),
+        ),
+    ]
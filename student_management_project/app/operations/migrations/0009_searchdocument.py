@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:15
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0008_feedback_inbox_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('student_feedback', 'Student feedback'), ('staff_feedback', 'Staff feedback'), ('student_leave', 'Student leave'), ('staff_leave', 'Staff leave'), ('contact', 'Contact message')], max_length=20)),
+                ('object_id', models.PositiveIntegerField()),
+                ('title', models.CharField(blank=True, default='', max_length=255)),
+                ('body', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_document')],
+            },
+        ),
+    ]
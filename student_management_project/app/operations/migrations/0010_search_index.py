@@ -0,0 +1,62 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:15
+
+from django.db import migrations
+
+# PostgreSQL: a trigger keeps search_vector in step with body, and a GIN index covers it
+POSTGRES_FORWARD = [
+    "CREATE INDEX operations_searchdocument_vector_gin ON operations_searchdocument USING gin (search_vector)",
+    """CREATE TRIGGER operations_searchdocument_vector_update
+       BEFORE INSERT OR UPDATE OF body ON operations_searchdocument
+       FOR EACH ROW EXECUTE PROCEDURE tsvector_update_trigger(search_vector, 'pg_catalog.english', body)""",
+]
+POSTGRES_BACKWARD = [
+    "DROP TRIGGER IF EXISTS operations_searchdocument_vector_update ON operations_searchdocument",
+    "DROP INDEX IF EXISTS operations_searchdocument_vector_gin",
+]
+
+# SQLite: an external-content FTS5 table mirrors body, kept in step by triggers.
+# Note that SQLite rebuilds a table on most ALTERs, which drops these triggers; a later
+# migration altering SearchDocument must recreate them.
+SQLITE_FORWARD = [
+    """CREATE VIRTUAL TABLE operations_searchdocument_fts USING fts5(
+       body, content='operations_searchdocument', content_rowid='id')""",
+    """CREATE TRIGGER operations_searchdocument_fts_insert AFTER INSERT ON operations_searchdocument BEGIN
+       INSERT INTO operations_searchdocument_fts(rowid, body) VALUES (new.id, new.body);
+       END""",
+    """CREATE TRIGGER operations_searchdocument_fts_delete AFTER DELETE ON operations_searchdocument BEGIN
+       INSERT INTO operations_searchdocument_fts(operations_searchdocument_fts, rowid, body)
+       VALUES ('delete', old.id, old.body);
+       END""",
+    """CREATE TRIGGER operations_searchdocument_fts_update AFTER UPDATE OF body ON operations_searchdocument BEGIN
+       INSERT INTO operations_searchdocument_fts(operations_searchdocument_fts, rowid, body)
+       VALUES ('delete', old.id, old.body);
+       INSERT INTO operations_searchdocument_fts(rowid, body) VALUES (new.id, new.body);
+       END""",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS operations_searchdocument_fts_update",
+    "DROP TRIGGER IF EXISTS operations_searchdocument_fts_delete",
+    "DROP TRIGGER IF EXISTS operations_searchdocument_fts_insert",
+    "DROP TABLE IF EXISTS operations_searchdocument_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0009_searchdocument'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            _run({'postgresql': POSTGRES_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
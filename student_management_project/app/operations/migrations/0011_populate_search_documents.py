@@ -0,0 +1,44 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:15
+
+from django.db import migrations
+from django.db.models import F, Value
+from django.db.models.functions import Concat
+
+
+def populate_search_documents(apps, schema_editor):
+    """Indexes the rows that existed before search; later writes are indexed by signals."""
+    SearchDocument = apps.get_model('operations', 'SearchDocument')
+
+    def full_name(owner):
+        return Concat(F(f'{owner}__admin__first_name'), Value(' '), F(f'{owner}__admin__last_name'))
+
+    sources = (
+        ('student_feedback', apps.get_model('operations', 'FeedBackStudent'), full_name('student_id'), 'feedback'),
+        ('staff_feedback', apps.get_model('operations', 'FeedBackStaffs'), full_name('staff_id'), 'feedback'),
+        ('student_leave', apps.get_model('operations', 'LeaveReportStudent'), full_name('student_id'), 'leave_message'),
+        ('staff_leave', apps.get_model('operations', 'LeaveReportStaff'), full_name('staff_id'), 'leave_message'),
+        ('contact', apps.get_model('core', 'ContactMessage'), Concat(F('name'), Value(' - '), F('subject')), 'message'),
+    )
+    for kind, model, title, body in sources:
+        rows = model.objects.values('id', 'created_at', title_text=title, body_text=F(body)).order_by()
+        SearchDocument.objects.bulk_create((
+            SearchDocument(
+                kind=kind,
+                object_id=row['id'],
+                title=(row['title_text'] or '').strip()[:255],
+                body=row['body_text'] or '',
+                created_at=row['created_at'],
+            ) for row in rows.iterator(chunk_size=2000)
+        ), batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_jobwatermark'),
+        ('operations', '0010_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_search_documents, migrations.RunPython.noop),
+    ]
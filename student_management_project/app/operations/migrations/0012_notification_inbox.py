@@ -0,0 +1,41 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_customuser_gender'),
+        ('operations', '0011_populate_search_documents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='notificationstaffs',
+            name='is_read',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='notificationstudent',
+            name='is_read',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='notificationstaffs',
+            index=models.Index(fields=['stafff_id', 'created_at', 'id'], name='notif_staff_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationstudent',
+            index=models.Index(fields=['student_id', 'created_at', 'id'], name='notif_student_inbox_idx'),
+        ),
+    ]
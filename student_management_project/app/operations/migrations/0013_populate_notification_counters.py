@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:20
+
+from django.db import migrations, models
+
+
+def populate_counters(apps, schema_editor):
+    """Counts the notifications sent before the inbox existed; all of them start unread."""
+    NotificationCounter = apps.get_model('operations', 'NotificationCounter')
+    totals = {}
+    for model_name, user_field in (('NotificationStudent', 'student_id__admin_id'), ('NotificationStaffs', 'stafff_id__admin_id')):
+        model = apps.get_model('operations', model_name)
+        rows = model.objects.filter(is_read=False).values(user_field).annotate(n=models.Count('id')).order_by()
+        for row in rows.iterator():
+            totals[row[user_field]] = totals.get(row[user_field], 0) + row['n']
+    NotificationCounter.objects.bulk_create(
+        (NotificationCounter(user_id=user_id, unread=n) for user_id, n in totals.items()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0012_notification_inbox'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
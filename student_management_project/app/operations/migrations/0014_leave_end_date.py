@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0013_populate_notification_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leavereportstaff',
+            name='leave_end_date',
+            field=models.DateField(null=True),
+        ),
+        migrations.AddField(
+            model_name='leavereportstudent',
+            name='leave_end_date',
+            field=models.DateField(null=True),
+        ),
+    ]
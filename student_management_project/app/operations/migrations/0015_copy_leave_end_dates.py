@@ -0,0 +1,22 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:31
+
+from django.db import migrations
+from django.db.models import F
+
+
+def copy_leave_end_dates(apps, schema_editor):
+    # Every existing leave was a single day
+    for model_name in ('LeaveReportStudent', 'LeaveReportStaff'):
+        model = apps.get_model('operations', model_name)
+        model.objects.filter(leave_end_date__isnull=True).update(leave_end_date=F('leave_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0014_leave_end_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_leave_end_dates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_customuser_gender'),
+        ('operations', '0015_copy_leave_end_dates'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='leavereportstaff',
+            name='leave_end_date',
+            field=models.DateField(),
+        ),
+        migrations.AlterField(
+            model_name='leavereportstudent',
+            name='leave_end_date',
+            field=models.DateField(),
+        ),
+        migrations.AddConstraint(
+            model_name='leavereportstaff',
+            constraint=models.CheckConstraint(condition=models.Q(('leave_end_date__gte', models.F('leave_date'))), name='leave_staff_period_valid'),
+        ),
+        migrations.AddConstraint(
+            model_name='leavereportstudent',
+            constraint=models.CheckConstraint(condition=models.Q(('leave_end_date__gte', models.F('leave_date'))), name='leave_student_period_valid'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:31
+
+from django.db import migrations
+
+TABLES = {
+    'student': 'operations_leavereportstudent',
+    'staff': 'operations_leavereportstaff',
+}
+
+# PostgreSQL: a GiST index over the inclusive daterange, which the && overlap filter in
+# leaves.py is written to match expression for expression
+POSTGRES_FORWARD = [
+    f"CREATE INDEX leave_{kind}_period_gist ON {table} USING gist (daterange(leave_date, leave_end_date, '[]'))"
+    for kind, table in TABLES.items()
+]
+# Elsewhere: a btree on (end, start). Overlap is end >= from AND start <= to, so the index
+# range-scans the leaves that have not ended before the window and checks start from the
+# same entries; past history is never read.
+# Like the FTS triggers in 0010, SQLite drops this index when it rebuilds the table for an
+# ALTER, so a later migration altering these models must recreate it.
+BTREE_FORWARD = [
+    f"CREATE INDEX leave_{kind}_period_idx ON {table} (leave_end_date, leave_date)"
+    for kind, table in TABLES.items()
+]
+POSTGRES_BACKWARD = [f"DROP INDEX IF EXISTS leave_{kind}_period_gist" for kind in TABLES]
+BTREE_BACKWARD = [f"DROP INDEX IF EXISTS leave_{kind}_period_idx" for kind in TABLES]
+
+
+def _run(postgres, other):
+    def run(apps, schema_editor):
+        statements = postgres if schema_editor.connection.vendor == 'postgresql' else other
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0016_leave_period'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run(POSTGRES_FORWARD, BTREE_FORWARD),
+            _run(POSTGRES_BACKWARD, BTREE_BACKWARD),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 20:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0017_leave_period_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportcardjob',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
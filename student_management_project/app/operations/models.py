@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from app.core.models import BaseModel
 
@@ -8,32 +9,157 @@ class StudentResult(BaseModel):
     subject_exam_marks = models.FloatField(default=0)
     subject_assignment_marks = models.FloatField(default=0)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student_id', 'subject_id'],
+                name='unique_student_result',
+            ),
+        ]
+
 class LeaveReportStudent(BaseModel):
     student_id = models.ForeignKey('accounts.Students', on_delete=models.CASCADE)
-    leave_date = models.CharField(max_length=255)
+    # First and last day of the leave, both inclusive; a one-day leave has them equal
+    leave_date = models.DateField()
+    leave_end_date = models.DateField()
     leave_message = models.TextField()
     leave_status = models.IntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['leave_status', 'created_at'], name='leave_student_status_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(leave_end_date__gte=models.F('leave_date')), name='leave_student_period_valid'
+            ),
+        ]
+
 class LeaveReportStaff(BaseModel):
     staff_id = models.ForeignKey('accounts.Staffs', on_delete=models.CASCADE)
-    leave_date = models.CharField(max_length=255)
+    # First and last day of the leave, both inclusive; a one-day leave has them equal
+    leave_date = models.DateField()
+    leave_end_date = models.DateField()
     leave_message = models.TextField()
     leave_status = models.IntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['leave_status', 'created_at'], name='leave_staff_status_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(leave_end_date__gte=models.F('leave_date')), name='leave_staff_period_valid'
+            ),
+        ]
+
 class FeedBackStudent(BaseModel):
     student_id = models.ForeignKey('accounts.Students', on_delete=models.CASCADE)
     feedback = models.TextField()
     feedback_reply = models.TextField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='feedback_student_created_idx'),
+            # Partial index: only the unanswered rows, which is what the admin inbox filters on
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=models.Q(feedback_reply=''),
+                name='feedback_student_unreplied_idx',
+            ),
+        ]
+
 class FeedBackStaffs(BaseModel):
     staff_id = models.ForeignKey('accounts.Staffs', on_delete=models.CASCADE)
     feedback = models.TextField()
     feedback_reply = models.TextField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='feedback_staff_created_idx'),
+            # Partial index: only the unanswered rows, which is what the admin inbox filters on
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=models.Q(feedback_reply=''),
+                name='feedback_staff_unreplied_idx',
+            ),
+        ]
+
 class NotificationStudent(BaseModel):
     student_id = models.ForeignKey('accounts.Students', on_delete=models.CASCADE)
     message = models.TextField()
+    is_read = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['student_id', 'created_at', 'id'], name='notif_student_inbox_idx'),
+        ]
 
 class NotificationStaffs(BaseModel):
     stafff_id = models.ForeignKey('accounts.Staffs', on_delete=models.CASCADE)
-    message = models.TextField()
\ No newline at end of file
+    message = models.TextField()
+    is_read = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['stafff_id', 'created_at', 'id'], name='notif_staff_inbox_idx'),
+        ]
+
+class NotificationCounter(models.Model):
+    """Unread notifications per user, adjusted whenever notifications are created or read."""
+    user = models.OneToOneField('accounts.CustomUser', on_delete=models.CASCADE, primary_key=True)
+    unread = models.IntegerField(default=0)
+
+class ReportCardJob(BaseModel):
+    """A batch of report cards being rendered for a course (and optionally one session)."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    status_data = ((PENDING, "Pending"), (RUNNING, "Running"), (DONE, "Done"), (FAILED, "Failed"))
+
+    course_id = models.ForeignKey('curriculum.Courses', on_delete=models.CASCADE)
+    session_year_id = models.ForeignKey('core.SessionYearModel', on_delete=models.CASCADE, null=True, blank=True)
+    requested_by = models.ForeignKey('accounts.CustomUser', on_delete=models.CASCADE)
+    status = models.CharField(max_length=20, choices=status_data, default=PENDING)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    artifacts = models.JSONField(default=list)
+    error = models.TextField(blank=True, default='')
+    # When a worker claimed the job: the cards reflect every change committed before this
+    started_at = models.DateTimeField(null=True, blank=True)
+
+class SearchDocument(models.Model):
+    """
+    One row per searchable text (feedback, leave messages, contact messages), kept in sync by
+    the signals in search.py. The full-text index itself lives in the database: on PostgreSQL
+    a trigger fills search_vector and a GIN index covers it; on SQLite an FTS5 table mirrors
+    body through triggers. Both are created in migration 0010_search_index.
+    """
+    STUDENT_FEEDBACK = 'student_feedback'
+    STAFF_FEEDBACK = 'staff_feedback'
+    STUDENT_LEAVE = 'student_leave'
+    STAFF_LEAVE = 'staff_leave'
+    CONTACT = 'contact'
+
+    kind_data = (
+        (STUDENT_FEEDBACK, "Student feedback"),
+        (STAFF_FEEDBACK, "Staff feedback"),
+        (STUDENT_LEAVE, "Student leave"),
+        (STAFF_LEAVE, "Staff leave"),
+        (CONTACT, "Contact message"),
+    )
+
+    kind = models.CharField(max_length=20, choices=kind_data)
+    object_id = models.PositiveIntegerField()
+    title = models.CharField(max_length=255, blank=True, default='')
+    body = models.TextField()
+    created_at = models.DateTimeField()
+    # Only populated on PostgreSQL
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document'),
+        ]
@@ -0,0 +1,170 @@
+"""
+Notification fan-out and unread counters.
+
+Recipients are selected in the database and streamed as ids, and the per-recipient rows are
+written with chunked bulk_create, so a broadcast to N people costs about N / CHUNK_SIZE INSERTs
+whatever N is. Every write also adjusts NotificationCounter, and unread_count() reads that
+counter through the cache, so polling the unread badge never counts rows.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from app.accounts.models import CustomUser, Staffs, Students
+from app.core.realtime import push, role_group, user_group
+from .models import NotificationCounter, NotificationStaffs, NotificationStudent
+
+CHUNK_SIZE = 2000
+# Broadcasts reaching more people than this are handed to Celery
+ASYNC_THRESHOLD = 2000
+ROLES = ('students', 'staff', 'all')
+COUNTER_TIMEOUT = 60 * 60 * 24
+
+RECIPIENT_FIELD = {
+    NotificationStudent: 'student_id_id',
+    NotificationStaffs: 'stafff_id_id',
+}
+RECIPIENT_ROLE = {
+    NotificationStudent: CustomUser.STUDENT,
+    NotificationStaffs: CustomUser.STAFF,
+}
+# A delivery reaching more users than this is announced with one event to the recipients'
+# role group ({"refetch": true}: re-read the unread count) instead of one event per user
+PUSH_PER_USER_LIMIT = 100
+
+
+def _version_key(user_id):
+    return f"notifications:unread:{user_id}:version"
+
+
+def _counter_key(user_id):
+    # Writes drop the version key, and the next read seeds a new one from the clock, so a count
+    # read before a commit but cached after it lands under a version nobody reads any more
+    version = cache.get_or_set(_version_key(user_id), time.time_ns, None)
+    return f"notifications:unread:{user_id}:v{version}"
+
+
+def bump_unread(deltas):
+    """
+    Applies {user_id: delta} to the unread counters. Users sharing a delta are updated together,
+    so a broadcast chunk is one upsert and one UPDATE. Cached counts are orphaned after commit.
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=user_id) for user_id in deltas], ignore_conflicts=True
+    )
+    groups = {}
+    for user_id, delta in deltas.items():
+        groups.setdefault(delta, []).append(user_id)
+    for delta, user_ids in groups.items():
+        NotificationCounter.objects.filter(user_id__in=user_ids).update(unread=F('unread') + delta)
+
+    keys = [_version_key(user_id) for user_id in deltas]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def unread_count(user_id):
+    """Unread notifications for a user, from the cache when possible."""
+    key = _counter_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = NotificationCounter.objects.filter(user_id=user_id).values_list('unread', flat=True).first() or 0
+        cache.set(key, count, COUNTER_TIMEOUT)
+    return count
+
+
+def deliver(model, items):
+    """
+    Writes notifications from an iterable of (recipient_id, user_id, message) in chunks,
+    keeping the unread counters in step. Returns the number written.
+    """
+    fk = RECIPIENT_FIELD[model]
+    written = 0
+    notified = {}  # user id -> new notifications, until there are too many users to push to one by one
+    with transaction.atomic():
+        chunk = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) == CHUNK_SIZE:
+                written += _write_chunk(model, fk, chunk, notified)
+                chunk = []
+        written += _write_chunk(model, fk, chunk, notified)
+
+        if len(notified) > PUSH_PER_USER_LIMIT:
+            push([(role_group(RECIPIENT_ROLE[model]), 'notification.created', {"refetch": True})])
+        else:
+            push((user_group(user_id), 'notification.created', {"new": n}) for user_id, n in notified.items())
+    return written
+
+
+def _write_chunk(model, fk, chunk, notified):
+    if not chunk:
+        return 0
+    model.objects.bulk_create([model(**{fk: recipient_id}, message=message) for recipient_id, _, message in chunk])
+    deltas = {}
+    for _, user_id, _ in chunk:
+        deltas[user_id] = deltas.get(user_id, 0) + 1
+    bump_unread(deltas)
+    if len(notified) <= PUSH_PER_USER_LIMIT:
+        for user_id, n in deltas.items():
+            notified[user_id] = notified.get(user_id, 0) + n
+    return len(chunk)
+
+
+def mark_read(queryset, user_id):
+    """Marks the unread notifications in `queryset` (one user's) as read. Returns how many changed."""
+    updated = queryset.filter(is_read=False).update(is_read=True)
+    bump_unread({user_id: -updated})
+    if updated:
+        # Other open tabs of the same user update their badge too
+        push([(user_group(user_id), 'notification.read', {"read": updated})])
+    return updated
+
+
+def target_recipients(role='all', course_id=None, session_year_id=None, subject_id=None):
+    """
+    Returns (students, staff) as values_list querysets of (profile id, user id) pairs, or None
+    for a role not targeted. Course and subject narrow both roles (staff by the subjects they
+    teach); session_year_id only applies to students.
+    """
+    if role not in ROLES:
+        raise ValueError(f"role must be one of {', '.join(ROLES)}")
+
+    students = staff = None
+    if role in ('students', 'all'):
+        students = Students.objects.all()
+        if course_id:
+            students = students.filter(course_id=course_id)
+        if session_year_id:
+            students = students.filter(session_year_id=session_year_id)
+        if subject_id:
+            students = students.filter(course_id__subjects__id=subject_id)
+        students = students.values_list('id', 'admin_id').order_by()
+
+    if role in ('staff', 'all'):
+        staff = Staffs.objects.all()
+        if course_id:
+            staff = staff.filter(admin__subjects__course_id=course_id)
+        if subject_id:
+            staff = staff.filter(admin__subjects__id=subject_id)
+        staff = staff.values_list('id', 'admin_id').distinct().order_by()
+
+    return students, staff
+
+
+def fan_out(message, students=None, staff=None):
+    """Sends `message` to every (profile id, user id) pair streamed from the querysets."""
+    def items(recipients):
+        for recipient_id, user_id in recipients.iterator(chunk_size=CHUNK_SIZE):
+            yield recipient_id, user_id, message
+
+    with transaction.atomic():
+        return {
+            "students": deliver(NotificationStudent, items(students)) if students is not None else 0,
+            "staff": deliver(NotificationStaffs, items(staff)) if staff is not None else 0,
+        }
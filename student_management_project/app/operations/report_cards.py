@@ -0,0 +1,129 @@
+"""
+Report card rendering. Cards are stored under REPORT_CARD_ROOT named by the SHA-256 of their
+data, so an unchanged card is never rendered twice and a changed one gets a new name. That
+directory is not served publicly: ReportCardArtifactAPIView streams artifacts to the users
+allowed to see the job.
+"""
+import hashlib
+import json
+
+from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db.models import F
+from django.template.loader import render_to_string
+
+from app.accounts.models import Students
+from app.attendance.models import AttendanceSummary
+from .models import StudentResult
+
+BATCH_SIZE = 200
+# Artifact kind -> content type
+ARTIFACT_TYPES = {
+    'json': 'application/json',
+    'html': 'text/html; charset=utf-8',
+}
+
+
+def artifact_storage():
+    return FileSystemStorage(location=settings.REPORT_CARD_ROOT)
+
+
+def artifact_name(digest, kind):
+    return f"{digest}.{kind}"
+
+
+def _batch_cards(students):
+    """Builds card data for one batch of students with one results query and one attendance query."""
+    student_ids = [s['id'] for s in students]
+
+    results = {}
+    for r in StudentResult.objects.filter(student_id__in=student_ids).values(
+        'student_id', 'subject_exam_marks', 'subject_assignment_marks', subject=F('subject_id__subject_name')
+    ).order_by('student_id', 'subject'):
+        results.setdefault(r['student_id'], []).append({
+            "subject": r['subject'],
+            "exam": r['subject_exam_marks'],
+            "assignment": r['subject_assignment_marks'],
+            "total": r['subject_exam_marks'] + r['subject_assignment_marks'],
+        })
+
+    attendance = {}
+    for a in AttendanceSummary.objects.filter(student_id__in=student_ids).values(
+        'student_id', 'present', 'total', subject=F('subject_id__subject_name')
+    ).order_by('student_id', 'subject'):
+        attendance.setdefault(a['student_id'], []).append({
+            "subject": a['subject'],
+            "present": a['present'],
+            "total": a['total'],
+            "percent": round((a['present'] / a['total'] * 100), 2) if a['total'] > 0 else 0,
+        })
+
+    for s in students:
+        marks = results.get(s['id'], [])
+        yield {
+            "student_id": s['id'],
+            "name": f"{s['admin__first_name']} {s['admin__last_name']}".strip(),
+            "email": s['admin__email'],
+            "course": s['course_id__course_name'],
+            "session": f"{s['session_year_id__session_start_year']} - {s['session_year_id__session_end_year']}"
+                       if s['session_year_id__session_start_year'] else "",
+            "results": marks,
+            "grand_total": sum(m["total"] for m in marks),
+            "attendance": attendance.get(s['id'], []),
+        }
+
+
+def _store(card):
+    """Writes the JSON and HTML artifacts for a card unless identical ones already exist."""
+    payload = json.dumps(card, sort_keys=True, default=str)
+    digest = hashlib.sha256(payload.encode()).hexdigest()
+    storage = artifact_storage()
+    json_name = artifact_name(digest, 'json')
+    html_name = artifact_name(digest, 'html')
+
+    if not storage.exists(json_name):
+        storage.save(json_name, ContentFile(payload.encode()))
+    if not storage.exists(html_name):
+        html = render_to_string('operations/report_card.html', {"card": card})
+        storage.save(html_name, ContentFile(html.encode()))
+
+    return {
+        "student_id": card["student_id"],
+        "name": card["name"],
+        "hash": digest,
+    }
+
+
+def course_students(course_id, session_year_id=None):
+    students = Students.objects.filter(course_id=course_id)
+    if session_year_id:
+        students = students.filter(session_year_id=session_year_id)
+    return students
+
+
+def render_batches(course_id, session_year_id=None, batch_size=BATCH_SIZE):
+    """Yields the artifact entries of each batch of students, in id order."""
+    students = course_students(course_id, session_year_id).values(
+        'id', 'admin__first_name', 'admin__last_name', 'admin__email', 'course_id__course_name',
+        'session_year_id__session_start_year', 'session_year_id__session_end_year',
+    ).order_by('id')
+
+    batch = []
+    for student in students.iterator(chunk_size=batch_size):
+        batch.append(student)
+        if len(batch) == batch_size:
+            yield [_store(card) for card in _batch_cards(batch)]
+            batch = []
+    if batch:
+        yield [_store(card) for card in _batch_cards(batch)]
+
+
+def changed_since(course_id, session_year_id, since):
+    """True when any result, attendance counter or student row behind a course's cards is newer than `since`."""
+    students = course_students(course_id, session_year_id)
+    return (
+        students.filter(updated_at__gt=since).exists()
+        or StudentResult.objects.filter(student_id__in=students, updated_at__gt=since).exists()
+        or AttendanceSummary.objects.filter(student_id__in=students, updated_at__gt=since).exists()
+    )
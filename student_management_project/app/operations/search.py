@@ -0,0 +1,132 @@
+"""
+Full-text search over feedback, leave messages and contact messages.
+
+Every searchable row is mirrored into SearchDocument by the save/delete signals connected in
+OperationsConfig.ready(); the database keeps the full-text index over SearchDocument.body
+(tsvector + GIN on PostgreSQL, FTS5 on SQLite), so one ranked query covers all sources.
+"""
+import re
+
+from django.db import connection, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+from django.db.models.functions import Cast, Concat
+from django.contrib.postgres.search import SearchQuery, SearchRank
+
+from app.core.models import ContactMessage
+from .models import FeedBackStaffs, FeedBackStudent, LeaveReportStaff, LeaveReportStudent, SearchDocument
+
+SEARCH_CONFIG = 'english'
+FTS_TABLE = 'operations_searchdocument_fts'
+
+
+def _full_name(owner):
+    return Concat(F(f'{owner}__admin__first_name'), Value(' '), F(f'{owner}__admin__last_name'))
+
+
+# kind -> (model, title expression, body field)
+SOURCES = {
+    SearchDocument.STUDENT_FEEDBACK: (FeedBackStudent, _full_name('student_id'), 'feedback'),
+    SearchDocument.STAFF_FEEDBACK: (FeedBackStaffs, _full_name('staff_id'), 'feedback'),
+    SearchDocument.STUDENT_LEAVE: (LeaveReportStudent, _full_name('student_id'), 'leave_message'),
+    SearchDocument.STAFF_LEAVE: (LeaveReportStaff, _full_name('staff_id'), 'leave_message'),
+    SearchDocument.CONTACT: (ContactMessage, Concat(F('name'), Value(' - '), F('subject')), 'message'),
+}
+KIND_OF = {model: kind for kind, (model, _, _) in SOURCES.items()}
+
+
+def _documents(kind, queryset):
+    _, title, body = SOURCES[kind]
+    rows = queryset.values('id', 'created_at', title_text=title, body_text=F(body)).order_by()
+    for row in rows.iterator(chunk_size=2000):
+        yield SearchDocument(
+            kind=kind,
+            object_id=row['id'],
+            title=(row['title_text'] or '').strip()[:255],
+            body=row['body_text'] or '',
+            created_at=row['created_at'],
+        )
+
+
+def _upsert(documents):
+    return SearchDocument.objects.bulk_create(
+        documents,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['title', 'body', 'created_at'],
+    )
+
+
+def rebuild_search_index():
+    """Re-creates every SearchDocument from the source tables. Returns the document count."""
+    count = 0
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        for kind, (model, _, _) in SOURCES.items():
+            batch = []
+            for document in _documents(kind, model.objects.all()):
+                batch.append(document)
+                if len(batch) == 2000:
+                    count += len(_upsert(batch))
+                    batch = []
+            count += len(_upsert(batch))
+    return count
+
+
+def _index_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    kind = KIND_OF[sender]
+    _upsert(list(_documents(kind, sender.objects.filter(pk=instance.pk))))
+
+
+def _unindex_deleted(sender, instance, **kwargs):
+    SearchDocument.objects.filter(kind=KIND_OF[sender], object_id=instance.pk).delete()
+
+
+def connect_signals():
+    for model in KIND_OF:
+        post_save.connect(_index_saved, sender=model, dispatch_uid=f'search_index_{model.__name__}')
+        post_delete.connect(_unindex_deleted, sender=model, dispatch_uid=f'search_unindex_{model.__name__}')
+
+
+def _fts5_query(text):
+    """Quotes each word so user input can never be read as FTS5 syntax; words are AND-ed."""
+    return ' '.join(f'"{word}"' for word in re.findall(r'\w+', text))
+
+
+def search_documents(text, kinds=None):
+    """SearchDocuments matching `text`, annotated with `rank` (higher is better)."""
+    documents = SearchDocument.objects.all()
+    if kinds:
+        documents = documents.filter(kind__in=kinds)
+
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+        # ts_rank is float4; as float8 the value survives the JSON round trip through a keyset
+        # cursor exactly, so a page's last row compares equal to the cursor instead of below it
+        rank = Cast(SearchRank(F('search_vector'), query), FloatField())
+        return documents.filter(search_vector=query).annotate(rank=rank)
+
+    if connection.vendor == 'sqlite':
+        match = _fts5_query(text)
+        if not match:
+            return documents.none()
+        # bm25() is lower for better matches, so it is negated to share the "higher is better" order
+        rank = RawSQL(
+            f"SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = operations_searchdocument.id",
+            (match,),
+        )
+        matches = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,))
+        return documents.filter(id__in=matches).annotate(rank=rank)
+
+    # No full-text index on other backends; every match ranks equally
+    words = re.findall(r'\w+', text)
+    if not words:
+        return documents.none()
+    for word in words:
+        documents = documents.filter(body__icontains=word)
+    return documents.annotate(rank=Value(1.0))
@@ -0,0 +1,122 @@
+from django.db import transaction
+from django.utils import timezone
+
+from app.accounts.models import CustomUser, Students
+from app.core import dashboard
+from app.core.realtime import push, role_group, user_group
+from app.attendance.services import InvalidStudentsError
+from app.curriculum.models import Subjects
+from .gradebook import invalidate_subjects
+from .models import LeaveReportStaff, LeaveReportStudent, StudentResult
+
+EXAM = 'subject_exam_marks'
+ASSIGNMENT = 'subject_assignment_marks'
+
+
+class NotEnrolledError(InvalidStudentsError):
+    """Raised when marks are given for a subject outside the student's course."""
+    def __init__(self, invalid_ids):
+        self.invalid_ids = invalid_ids
+        Exception.__init__(self, "One or more students are not enrolled in the subject's course")
+
+
+def _to_marks(value):
+    return float(value or 0)
+
+
+def normalize_marks(marks):
+    """
+    Accepts either a bare number (exam marks, the AddResult form's payload) or a dict with
+    `exam` and/or `assignment`. Returns {field: value} for the fields that were supplied.
+    """
+    if isinstance(marks, dict):
+        fields = {}
+        if 'exam' in marks:
+            fields[EXAM] = _to_marks(marks['exam'])
+        if 'assignment' in marks:
+            fields[ASSIGNMENT] = _to_marks(marks['assignment'])
+        if not fields:
+            raise ValueError("Marks need an 'exam' or 'assignment' value")
+        return fields
+    return {EXAM: _to_marks(marks)}
+
+
+def save_subject_marks(rows):
+    """
+    Upserts marks for many (student_id, subject_id) pairs in one transaction.
+    `rows` maps (student_id, subject_id) -> {field: value}. Rows are grouped by which fields
+    they carry, so each group is one INSERT ... ON CONFLICT UPDATE that leaves the other
+    field untouched. Every student must be enrolled in the course of each subject they get
+    marks for. Returns the number of rows written.
+    """
+    student_ids = {student_id for student_id, _ in rows}
+    courses = dict(Students.objects.filter(id__in=student_ids).values_list('id', 'course_id'))
+    invalid_ids = sorted(student_ids - courses.keys())
+    if invalid_ids:
+        raise InvalidStudentsError(invalid_ids)
+
+    subject_courses = dict(Subjects.objects.filter(
+        id__in={subject_id for _, subject_id in rows}
+    ).values_list('id', 'course_id'))
+    not_enrolled = sorted({
+        student_id for student_id, subject_id in rows
+        if subject_courses.get(subject_id) != courses[student_id]
+    })
+    if not_enrolled:
+        raise NotEnrolledError(not_enrolled)
+
+    groups = {}
+    for (student_id, subject_id), fields in rows.items():
+        groups.setdefault(tuple(sorted(fields)), []).append(
+            StudentResult(student_id_id=student_id, subject_id_id=subject_id, **fields)
+        )
+
+    with transaction.atomic():
+        for fields, results in groups.items():
+            StudentResult.objects.bulk_create(
+                results,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=['student_id', 'subject_id'],
+                update_fields=list(fields) + ['updated_at'],
+            )
+        subject_ids = {subject_id for _, subject_id in rows}
+        transaction.on_commit(lambda: invalidate_subjects(subject_ids))
+        # bulk_create sends no post_save, so the dashboard's per-subject chart is dropped here
+        dashboard.invalidate(dashboard.INVALIDATED_BY[StudentResult])
+    return len(rows)
+
+
+def set_leave_status(student_leave_ids, staff_leave_ids, new_status):
+    """
+    Sets the status of many student and staff leaves in one transaction, with one UPDATE per
+    table. The matching rows are locked first so the ids that do not exist can be reported,
+    and each leave's owner plus the admins are pushed the change.
+    Returns {"student": {"updated", "missing"}, "staff": {...}}.
+    """
+    result = {}
+    events = []
+    with transaction.atomic():
+        now = timezone.now()
+        for kind, model, owner, ids in (
+            ('student', LeaveReportStudent, 'student_id__admin_id', student_leave_ids),
+            ('staff', LeaveReportStaff, 'staff_id__admin_id', staff_leave_ids),
+        ):
+            ids = {int(leave_id) for leave_id in ids}
+            owners = dict(
+                model.objects.select_for_update(of=('self',)).filter(id__in=ids).values_list('id', owner)
+            ) if ids else {}
+            updated = model.objects.filter(id__in=owners).update(leave_status=new_status, updated_at=now) if owners else 0
+            result[kind] = {"updated": updated, "missing": sorted(ids - owners.keys())}
+
+            by_user = {}
+            for leave_id, user_id in owners.items():
+                by_user.setdefault(user_id, []).append(leave_id)
+            events += [
+                (user_group(user_id), 'leave.updated', {"type": kind, "ids": sorted(leave_ids), "status": new_status})
+                for user_id, leave_ids in by_user.items()
+            ]
+            if owners:
+                events.append((role_group(CustomUser.HOD), 'leave.updated', {"type": kind, "ids": sorted(owners), "status": new_status}))
+        push(events)
+    return result
@@ -0,0 +1,44 @@
+from celery import shared_task
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ReportCardJob
+from .notifications import fan_out, target_recipients
+from .report_cards import course_students, render_batches
+
+
+@shared_task
+def generate_report_cards(job_id):
+    """Renders a job's report cards batch by batch, saving progress after every batch."""
+    # started_at is stamped before any data is read, so it is the point the cards are current as of
+    claimed = ReportCardJob.objects.filter(id=job_id, status=ReportCardJob.PENDING).update(
+        status=ReportCardJob.RUNNING, started_at=timezone.now()
+    )
+    if not claimed:
+        return
+
+    job = ReportCardJob.objects.get(id=job_id)
+    try:
+        job.total = course_students(job.course_id_id, job.session_year_id_id).count()
+        job.save(update_fields=['total', 'updated_at'])
+
+        artifacts = []
+        for batch in render_batches(job.course_id_id, job.session_year_id_id):
+            artifacts += batch
+            ReportCardJob.objects.filter(id=job_id).update(processed=F('processed') + len(batch))
+
+        job.refresh_from_db(fields=['processed'])
+        job.artifacts = artifacts
+        job.status = ReportCardJob.DONE
+        job.save(update_fields=['artifacts', 'status', 'updated_at'])
+    except Exception as e:
+        job.status = ReportCardJob.FAILED
+        job.error = str(e)
+        job.save(update_fields=['status', 'error', 'updated_at'])
+
+
+@shared_task
+def broadcast_notification(message, target):
+    """Fans a notification out to the recipients of `target` (the kwargs of target_recipients)."""
+    students, staff = target_recipients(**target)
+    return fan_out(message, students, staff)
@@ -1,3 +1,236 @@
+import datetime
+import io
+
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from app.accounts.models import AdminHOD, CustomUser, Staffs, Students
+from app.core.models import SessionYearModel
+from app.curriculum.models import Courses, Subjects
+from . import notifications
+from .marks_import import import_marks_csv
+from .models import LeaveReportStaff, LeaveReportStudent, NotificationStudent, StudentResult
+from .notifications import deliver, fan_out, mark_read, target_recipients, unread_count
+from .services import ASSIGNMENT, EXAM, NotEnrolledError, save_subject_marks, set_leave_status
+
+
+class MarksImportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        staff = CustomUser.objects.create_user(
+            username='import.staff', email='import.staff@example.com', password='pass', user_type='2'
+        )
+        session = SessionYearModel.objects.create(
+            session_start_year=datetime.date(2025, 1, 1), session_end_year=datetime.date(2025, 12, 31)
+        )
+        cls.students = {}
+        cls.subjects = {}
+        for name in ('C1', 'C2'):
+            course = Courses.objects.create(course_name=name)
+            # Both courses teach a subject called Math
+            cls.subjects[name] = Subjects.objects.create(subject_name='Math', course_id=course, staff_id=staff)
+            user = CustomUser.objects.create_user(
+                username=f'import.{name}', email=f'import.{name}@example.com', password='pass', user_type='3'
+            )
+            cls.students[name] = Students.objects.create(admin=user, course_id=course, session_year_id=session)
+
+    def _import(self, lines):
+        return import_marks_csv(io.BytesIO('\n'.join(['student,subject,exam'] + lines).encode()))
+
+    def test_shared_subject_name_resolves_within_the_students_course(self):
+        report = self._import([
+            f"{self.students['C1'].id},Math,40",
+            f"{self.students['C2'].id},math,60",
+        ])
+        self.assertEqual(report.as_dict()['failed'], 0, report.errors)
+        self.assertEqual(report.saved, 2)
+        self.assertEqual(
+            set(StudentResult.objects.values_list('student_id', 'subject_id', 'subject_exam_marks')),
+            {
+                (self.students['C1'].id, self.subjects['C1'].id, 40.0),
+                (self.students['C2'].id, self.subjects['C2'].id, 60.0),
+            },
+        )
+
+    def test_subject_id_from_another_course_is_rejected(self):
+        report = self._import([f"{self.students['C1'].id},{self.subjects['C2'].id},40"])
+        self.assertEqual(report.saved, 0)
+        self.assertEqual(report.errors[0]['error'], "Subject is not part of the student's course")
+
+    def test_unknown_subject_is_reported(self):
+        report = self._import([f"{self.students['C1'].id},Physics,40"])
+        self.assertEqual(report.errors[0]['error'], "Unknown subject 'Physics'")
+
+
+class OperationsTestCase(TestCase):
+    """A course with two subjects, four students, their staff member and an admin."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hod = CustomUser.objects.create_user(
+            username='ops.hod', email='ops.hod@example.com', password='pass', user_type='1'
+        )
+        AdminHOD.objects.create(admin=cls.hod)
+        cls.staff_user = CustomUser.objects.create_user(
+            username='ops.staff', email='ops.staff@example.com', password='pass', user_type='2'
+        )
+        cls.staff = Staffs.objects.create(admin=cls.staff_user, address='')
+        session = SessionYearModel.objects.create(
+            session_start_year=datetime.date(2025, 1, 1), session_end_year=datetime.date(2025, 12, 31)
+        )
+        cls.course = Courses.objects.create(course_name='Ops Course')
+        cls.subjects = [
+            Subjects.objects.create(subject_name=f'Ops Subject {i}', course_id=cls.course, staff_id=cls.staff_user)
+            for i in range(2)
+        ]
+        cls.students = []
+        for i in range(4):
+            user = CustomUser.objects.create_user(
+                username=f'ops.student{i}', email=f'ops.student{i}@example.com', password='pass', user_type='3'
+            )
+            cls.students.append(Students.objects.create(admin=user, course_id=cls.course, session_year_id=session))
+
+    def setUp(self):
+        cache.clear()
+
+    def _client(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+
+class SubjectMarksTests(OperationsTestCase):
+
+    def test_assignment_only_rows_leave_exam_marks_alone(self):
+        subject = self.subjects[0].id
+        save_subject_marks({(self.students[0].id, subject): {EXAM: 40.0, ASSIGNMENT: 5.0}})
+        save_subject_marks({(self.students[0].id, subject): {ASSIGNMENT: 9.0}})
+        self.assertEqual(
+            list(StudentResult.objects.values_list('subject_exam_marks', 'subject_assignment_marks')), [(40.0, 9.0)]
+        )
+
+    def test_marks_for_a_subject_outside_the_course_are_rejected(self):
+        other = Subjects.objects.create(
+            subject_name='Elsewhere', course_id=Courses.objects.create(course_name='Other'), staff_id=self.staff_user
+        )
+        with self.assertRaises(NotEnrolledError) as raised:
+            save_subject_marks({
+                (self.students[0].id, self.subjects[0].id): {EXAM: 10.0},
+                (self.students[1].id, other.id): {EXAM: 10.0},
+            })
+        self.assertEqual(raised.exception.invalid_ids, [self.students[1].id])
+        self.assertFalse(StudentResult.objects.exists())
+
+        response = self._client(self.hod).post('/api/operations/manage-results/', {
+            "subject_id": other.id, "marks_list": {str(self.students[0].id): 10},
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['invalid_ids'], [self.students[0].id])
+
+
+class GradebookStatsTests(OperationsTestCase):
+
+    def _stats(self, **params):
+        return self._client(self.staff_user).get('/api/operations/gradebook-stats/', params)
+
+    def test_cached_stats_are_dropped_when_marks_change(self):
+        subject = self.subjects[0].id
+        with self.captureOnCommitCallbacks(execute=True):
+            save_subject_marks({(s.id, subject): {EXAM: 10.0 * (i + 1)} for i, s in enumerate(self.students)})
+        stats = self._stats(subject_id=subject, field='exam').data
+        self.assertEqual((stats['count'], stats['maximum'], stats['mean']), (4, 40.0, 25.0))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self._client(self.hod).get(
+                '/api/operations/gradebook-stats/', {"subject_id": subject, "field": "exam"}
+            ).data, stats)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            save_subject_marks({(self.students[0].id, subject): {EXAM: 90.0}})
+        self.assertEqual(self._stats(subject_id=subject, field='exam').data['maximum'], 90.0)
+
+    def test_bucket_must_be_a_positive_finite_number(self):
+        for bucket in ('0', '-5', 'nan', 'inf', 'x'):
+            self.assertEqual(self._stats(subject_id=self.subjects[0].id, bucket=bucket).status_code, 400, bucket)
+
+    def test_students_are_forbidden(self):
+        response = self._client(self.students[0].admin).get(
+            '/api/operations/gradebook-stats/', {"subject_id": self.subjects[0].id}
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class LeaveStatusTests(OperationsTestCase):
+
+    def _leave(self, model, **owner):
+        day = datetime.date(2025, 4, 1)
+        return model.objects.create(leave_date=day, leave_end_date=day, leave_message='m', **owner)
+
+    def test_both_tables_are_updated_and_missing_ids_reported(self):
+        student_leaves = [self._leave(LeaveReportStudent, student_id=s) for s in self.students[:3]]
+        staff_leave = self._leave(LeaveReportStaff, staff_id=self.staff)
+        # Per table: one locking read and one UPDATE, plus the transaction's savepoint pair
+        with self.assertNumQueries(6):
+            result = set_leave_status([leave.id for leave in student_leaves] + [9999], [staff_leave.id], 1)
+        self.assertEqual(result['student'], {"updated": 3, "missing": [9999]})
+        self.assertEqual(result['staff'], {"updated": 1, "missing": []})
+        self.assertEqual(set(LeaveReportStudent.objects.values_list('leave_status', flat=True)), {1})
+        staff_leave.refresh_from_db()
+        self.assertEqual(staff_leave.leave_status, 1)
+
+    def test_only_admins_may_decide_leaves(self):
+        leave = self._leave(LeaveReportStudent, student_id=self.students[0])
+        response = self._client(self.staff_user).post(
+            '/api/operations/leave/action/', {"student_leave_ids": [leave.id], "status": 1}, format='json'
+        )
+        self.assertEqual(response.status_code, 403)
+        response = self._client(self.hod).post(
+            '/api/operations/leave/action/', {"student_leave_ids": [leave.id], "status": 7}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class NotificationInboxTests(OperationsTestCase):
+
+    def _broadcast(self, count):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(count):
+                fan_out(f'message {i}', *target_recipients('students'))
+
+    def test_inbox_pages_newest_first_without_repeats(self):
+        self._broadcast(5)
+        client = self._client(self.students[0].admin)
+        first = client.get('/api/operations/notifications/', {"page_size": 2}).data
+        second = client.get('/api/operations/notifications/', {"page_size": 2, "cursor": first['next_cursor']}).data
+        third = client.get('/api/operations/notifications/', {"page_size": 2, "cursor": second['next_cursor']}).data
+        messages = [n['message'] for page in (first, second, third) for n in page['results']]
+        self.assertEqual(messages, [f'message {i}' for i in range(4, -1, -1)])
+        self.assertIsNone(third['next_cursor'])
+
+    def test_unread_count_is_cached_and_moves_with_each_write(self):
+        self._broadcast(3)
+        user = self.students[0].admin
+        self.assertEqual(unread_count(user.id), 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(user.id), 3)
+
+        notification = NotificationStudent.objects.filter(student_id=self.students[0]).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(mark_read(NotificationStudent.objects.filter(id=notification.id), user.id), 1)
+        self.assertEqual(unread_count(user.id), 2)
+        # Marking it again is a no-op for the counter
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(mark_read(NotificationStudent.objects.filter(id=notification.id), user.id), 0)
+        self.assertEqual(unread_count(user.id), 2)
 
-# Create your tests here.
+    def test_a_count_cached_before_a_commit_is_never_read_after_it(self):
+        user = self.students[0].admin
+        self.assertEqual(unread_count(user.id), 0)
+        stale_key = notifications._counter_key(user.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            deliver(NotificationStudent, [(self.students[0].id, user.id, 'hello')])
+        # A reader that counted before the commit stores its value late
+        cache.set(stale_key, 0)
+        self.assertEqual(unread_count(user.id), 1)
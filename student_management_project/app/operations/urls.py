@@ -6,10 +6,23 @@ from .views import (
     StaffLeaveAPIView,
     StudentLeaveAPIView,     
     AdminLeaveActionAPIView,
+    LeaveOverlapAPIView,
+    LeaveCalendarAPIView,
     AdminStudentLeaveView,  
     FeedbackAPIView,
     AdminFeedbackView,
     StudentResultAPIView,
+    StudentResultListAPIView,
+    GradebookStatsAPIView,
+    TopResultsAPIView,
+    ReportCardJobAPIView,
+    ReportCardArtifactAPIView,
+    MarksImportAPIView,
+    SearchAPIView,
+    NotificationBroadcastAPIView,
+    NotificationInboxAPIView,
+    NotificationReadAPIView,
+    NotificationUnreadCountAPIView,
     ContactCreateView,
     AdminStaffLeaveView
 )
@@ -31,13 +44,29 @@ urlpatterns = [
     # Admin approval/rejection logic
     path('leave/action/', AdminLeaveActionAPIView.as_view(), name='api_leave_action'),
 
+    # Who is away: leaves overlapping a date range, and a per-day calendar for a month
+    path('leave/overlaps/', LeaveOverlapAPIView.as_view(), name='api_leave_overlaps'),
+    path('leave/calendar/', LeaveCalendarAPIView.as_view(), name='api_leave_calendar'),
+
     # --- FEEDBACK & COMMUNICATIONS ---
     path('feedback/', FeedbackAPIView.as_view(), name='api_feedback'),
     path('admin-feedback/', AdminFeedbackView.as_view(), name='api_admin_feedback'),
+    path('search/', SearchAPIView.as_view(), name='api_search'),
+    path('notifications/', NotificationInboxAPIView.as_view(), name='api_notifications'),
+    path('notifications/read/', NotificationReadAPIView.as_view(), name='api_notifications_read'),
+    path('notifications/unread-count/', NotificationUnreadCountAPIView.as_view(), name='api_notifications_unread_count'),
+    path('notifications/broadcast/', NotificationBroadcastAPIView.as_view(), name='api_notification_broadcast'),
 
     # --- ACADEMICS & RESULTS ---
     path('manage-results/', StudentResultAPIView.as_view(), name='api_manage_results'),
     path('save-result/', StudentResultAPIView.as_view(), name='api_save_result'),
+    path('results/import/', MarksImportAPIView.as_view(), name='api_results_import'),
+    path('results/', StudentResultListAPIView.as_view(), name='api_results_list'),
+    path('gradebook-stats/', GradebookStatsAPIView.as_view(), name='api_gradebook_stats'),
+    path('top-results/', TopResultsAPIView.as_view(), name='api_top_results'),
+    path('report-cards/', ReportCardJobAPIView.as_view(), name='api_report_cards'),
+    path('report-cards/<int:job_id>/', ReportCardJobAPIView.as_view(), name='api_report_card_status'),
+    path('report-cards/<int:job_id>/artifacts/<slug:digest>.<slug:kind>', ReportCardArtifactAPIView.as_view(), name='api_report_card_artifact'),
 
     # --- PUBLIC SERVICES ---
     path('contact/send/', ContactCreateView.as_view(), name='api_contact_send'),
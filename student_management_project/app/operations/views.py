@@ -1,16 +1,40 @@
-from django.db.models import Count
+import math
+
+from django.db import transaction
+from django.db.models import F, Q, Value
+from django.http import FileResponse
+from django.urls import reverse
 from rest_framework.views import APIView
 from rest_framework.generics import CreateAPIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
+from rest_framework.authentication import SessionAuthentication
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
 from django.views.decorators.csrf import csrf_exempt
+from django.utils import timezone
 from django.utils.decorators import method_decorator
+from django.utils.dateparse import parse_date
 
-from app.accounts.models import Students, Staffs
+from app.accounts.models import CustomUser, Students
 from app.curriculum.models import Courses, Subjects
 from .models import *
 from app.core.models import ContactMessage
+from app.core.dashboard import get_snapshot
+from app.core.realtime import push, role_group, user_group
+from app.core.pagination import InvalidCursor, keyset_page, keyset_union_page, page_params
 from .serializers import *
+from .services import normalize_marks, save_subject_marks, set_leave_status
+from .report_cards import ARTIFACT_TYPES, artifact_name, artifact_storage, changed_since
+from .marks_import import import_marks_csv
+from .search import search_documents
+from .leaves import LEAVE_KINDS, active_leaves, month_calendar
+from .notifications import ASYNC_THRESHOLD, fan_out, mark_read, target_recipients, unread_count
+from .tasks import broadcast_notification, generate_report_cards
+from .gradebook import (
+    AFTER_RANKING, FIELDS as GRADEBOOK_FIELDS, get_stats as get_gradebook_stats,
+    ranked_course_totals, ranked_results,
+)
+from app.attendance.services import InvalidStudentsError
 from app.core.serializers import ContactSerializer
 
 # --- 1. ADMIN DASHBOARD & ACTIONS ---
@@ -21,52 +45,26 @@ class DashboardChartDataAPIView(APIView):
 
     def get(self, request):
         try:
-            student_count = Students.objects.count()
-            staff_count = Staffs.objects.count()
-            
+            snapshot = get_snapshot()
             return Response({
                 "cards": {
-                    "total_students": student_count,
-                    "total_staffs": staff_count,
-                    "total_courses": Courses.objects.count(),
-                    "total_subjects": Subjects.objects.count(),
-                    "total_feedback": FeedBackStudent.objects.count() + FeedBackStaffs.objects.count(),
-                    "total_contacts": ContactMessage.objects.count()
+                    "total_students": snapshot['total_students'],
+                    "total_staffs": snapshot['total_staffs'],
+                    "total_courses": snapshot['total_courses'],
+                    "total_subjects": snapshot['total_subjects'],
+                    "total_feedback": snapshot['total_feedback'],
+                    "total_contacts": snapshot['total_contacts']
                 },
                 "staff_student_chart": [
-                    {"name": "Students", "value": student_count},
-                    {"name": "Staffs", "value": staff_count}
+                    {"name": "Students", "value": snapshot['total_students']},
+                    {"name": "Staffs", "value": snapshot['total_staffs']}
                 ],
-                "course_distribution": list(Courses.objects.annotate(
-                    value=Count('subjects')).values('course_name', 'value')),
-                "last_updated": "400"
+                "course_distribution": snapshot['subjects_per_course'],
+                "last_updated": snapshot['last_updated']
             })
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-@method_decorator(csrf_exempt, name='dispatch')
-class AdminLeaveActionAPIView(APIView):
-    """HOD approves (1) or rejects (2) leave requests for both staff and students."""
-    permission_classes = [permissions.IsAdminUser]
-
-    def post(self, request):
-        try:
-            leave_id = request.data.get('leave_id')
-            leave_type = request.data.get('type')  # 'staff' or 'student'
-            new_status = request.data.get('status')  # 1: Approved, 2: Rejected
-
-            if leave_type == 'staff':
-                leave = LeaveReportStaff.objects.get(id=leave_id)
-            else:
-                leave = LeaveReportStudent.objects.get(id=leave_id)
-            
-            leave.leave_status = new_status
-            leave.save()
-            return Response({"message": f"Leave status updated to {new_status}"}, status=status.HTTP_200_OK)
-        except Exception as e:
-            return Response({"error": "Leave record not found or invalid data"}, status=status.HTTP_404_NOT_FOUND)
-
-
 # --- 2. STAFF DASHBOARD & LEAVE ---
 
 class StaffHomeStats(APIView):
@@ -82,9 +80,9 @@ class StaffHomeStats(APIView):
         
         return Response({
             "cards": {
-                "students_under_me": Students.objects.filter(course_id__subjects__staff_id=staff).distinct().count(),
+                "students_under_me": Students.objects.filter(course_id__subjects__staff_id=request.user).distinct().count(),
                 "total_leave_taken": leaves.count(),
-                "total_subjects": Subjects.objects.filter(staff_id=staff).count(),
+                "total_subjects": Subjects.objects.filter(staff_id=request.user).count(),
                 "total_attendance_taken": 0, 
             },
             "leave_chart_data": [
@@ -92,9 +90,28 @@ class StaffHomeStats(APIView):
                 {"name": "Pending", "value": leaves.filter(leave_status=0).count()},
                 {"name": "Rejected", "value": leaves.filter(leave_status=2).count()},
             ],
-            "last_updated": "400"
+            "last_updated": timezone.now().isoformat()
         })
 
+
+def _leave_period(data):
+    """
+    Reads leave_date and the optional leave_end_date (defaults to leave_date, a one-day leave).
+    Raises ValueError with a client-facing message.
+    """
+    leave_date = parse_date(str(data.get('leave_date') or ''))
+    if leave_date is None:
+        raise ValueError("Missing or invalid leave_date (YYYY-MM-DD).")
+    leave_end_date = data.get('leave_end_date')
+    if not leave_end_date:
+        return leave_date, leave_date
+    leave_end_date = parse_date(str(leave_end_date))
+    if leave_end_date is None:
+        raise ValueError("Invalid leave_end_date (YYYY-MM-DD).")
+    if leave_end_date < leave_date:
+        raise ValueError("leave_end_date cannot be before leave_date.")
+    return leave_date, leave_end_date
+
 @method_decorator(csrf_exempt, name='dispatch')
 class StaffLeaveAPIView(APIView):
     """Staff apply for leave (POST) and view their own history (GET)."""
@@ -108,12 +125,18 @@ class StaffLeaveAPIView(APIView):
 
     def post(self, request):
         try:
-            LeaveReportStaff.objects.create(
+            try:
+                leave_date, leave_end_date = _leave_period(request.data)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=400)
+            leave = LeaveReportStaff.objects.create(
                 staff_id=request.user.staffs,
-                leave_date=request.data.get('leave_date'),
+                leave_date=leave_date,
+                leave_end_date=leave_end_date,
                 leave_message=request.data.get('leave_message'),
                 leave_status=0 
             )
+            push([(role_group(CustomUser.HOD), 'leave.created', {"type": "staff", "id": leave.id})])
             return Response({"message": "Leave applied successfully"}, status=201)
         except Exception as e:
             return Response({"error": str(e)}, status=400)
@@ -137,7 +160,7 @@ class StudentHomeStats(APIView):
                 "feedback_sent": FeedBackStudent.objects.filter(student_id=student).count(),
             },
             "attendance_stats": [{"name": "Present", "value": 0}, {"name": "Absent", "value": 0}],
-            "last_updated": "300"
+            "last_updated": timezone.now().isoformat()
         })
 
 
@@ -154,9 +177,11 @@ class FeedbackAPIView(APIView):
             return Response({"error": "Feedback text is required"}, status=400)
         try:
             if hasattr(user, 'staffs'): 
-                FeedBackStaffs.objects.create(staff_id=user.staffs, feedback=msg)
+                fb = FeedBackStaffs.objects.create(staff_id=user.staffs, feedback=msg)
+                push([(role_group(CustomUser.HOD), 'feedback.created', {"type": "Staff", "id": fb.id})])
             elif hasattr(user, 'students'): 
-                FeedBackStudent.objects.create(student_id=user.students, feedback=msg)
+                fb = FeedBackStudent.objects.create(student_id=user.students, feedback=msg)
+                push([(role_group(CustomUser.HOD), 'feedback.created', {"type": "Student", "id": fb.id})])
             return Response({"message": "Feedback sent successfully"})
         except Exception as e:
             return Response({"error": str(e)}, status=400)
@@ -175,6 +200,10 @@ class FeedbackAPIView(APIView):
 
 
 class AdminFeedbackView(APIView):
+    """
+    Admin inbox of student and staff feedback, newest first, in keyset pages.
+    ?unreplied=1 limits it to feedback without a reply.
+    """
     # Change from IsAdminUser to IsAuthenticated so the request actually reaches the GET method
     permission_classes = [permissions.IsAuthenticated]
 
@@ -183,34 +212,37 @@ class AdminFeedbackView(APIView):
         if request.user.user_type != '1':
             return Response({"detail": "Forbidden: Admin access only."}, status=403)
 
-        # Fetch both and label them for the React frontend
-        student_fb = FeedBackStudent.objects.select_related('student_id__admin').all()
-        staff_fb = FeedBackStaffs.objects.select_related('staff_id__admin').all()
+        # Both tables are merged with UNION ALL in the database and paged on (created_at, type, id)
+        branches = []
+        for label, model, owner in (('Student', FeedBackStudent, 'student_id'), ('Staff', FeedBackStaffs, 'staff_id')):
+            feedback = model.objects.all()
+            if request.query_params.get('unreplied') in ('1', 'true'):
+                feedback = feedback.filter(feedback_reply='')
+            branches.append(feedback.annotate(
+                type=Value(label),
+                first_name=F(f'{owner}__admin__first_name'),
+                last_name=F(f'{owner}__admin__last_name'),
+                email=F(f'{owner}__admin__email'),
+            ).values('id', 'created_at', 'feedback', 'feedback_reply', 'type', 'first_name', 'last_name', 'email'))
 
-        data = [
-            {
-                "id": f.id,
-                "user": f.student_id.admin.get_full_name(),
-                "email": f.student_id.admin.email, 
-                "message": f.feedback,
-                "reply": f.feedback_reply,
-                "type": "Student", 
-                "date": f.created_at
-            } for f in student_fb
-        ] + [
-            {
-                "id": f.id,
-                "user": f.staff_id.admin.get_full_name(),
-                "email": f.staff_id.admin.email, 
-                "message": f.feedback,
-                "reply": f.feedback_reply,
-                "type": "Staff", 
-                "date": f.created_at
-            } for f in staff_fb
-        ]
-        
-        data.sort(key=lambda x: x['date'], reverse=True)
-        return Response(data)
+        cursor, page_size = page_params(request)
+        try:
+            rows, next_cursor = keyset_union_page(
+                branches, ['created_at', 'type', 'id'], cursor, page_size, descending=True
+            )
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = [{
+            "id": f['id'],
+            "user": f"{f['first_name']} {f['last_name']}".strip(),
+            "email": f['email'],
+            "message": f['feedback'],
+            "reply": f['feedback_reply'],
+            "type": f['type'],
+            "date": f['created_at'],
+        } for f in rows]
+        return Response({"results": data, "next_cursor": next_cursor})
 
     def post(self, request):
         if request.user.user_type != '1':
@@ -222,12 +254,170 @@ class AdminFeedbackView(APIView):
 
         model = FeedBackStudent if user_type == "Student" else FeedBackStaffs
         try:
-            fb = model.objects.get(id=fb_id)
+            owner = 'student_id' if model is FeedBackStudent else 'staff_id'
+            fb = model.objects.select_related(owner).get(id=fb_id)
             fb.feedback_reply = reply
             fb.save()
+            push([(user_group(getattr(fb, owner).admin_id), 'feedback.replied', {"id": fb.id, "reply": reply})])
             return Response({"message": "Reply submitted"})
         except model.DoesNotExist:
             return Response({"error": "Feedback record not found"}, status=404)
+
+
+class SearchAPIView(APIView):
+    """
+    Admin: ranked full-text search over feedback, leave and contact messages.
+    ?q= is the query, ?type= optionally limits it to comma-separated kinds
+    (student_feedback, staff_feedback, student_leave, staff_leave, contact).
+    Results come in keyset pages ordered by rank.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if request.user.user_type != '1':
+            return Response({"detail": "Forbidden"}, status=403)
+
+        text = (request.query_params.get('q') or '').strip()
+        if not text:
+            return Response({"error": "q is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        kinds = [k for k in (request.query_params.get('type') or '').split(',') if k]
+        valid_kinds = dict(SearchDocument.kind_data)
+        if any(k not in valid_kinds for k in kinds):
+            return Response({"error": f"type must be one of {', '.join(valid_kinds)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        cursor, page_size = page_params(request)
+        try:
+            rows, next_cursor = keyset_page(
+                search_documents(text, kinds), ['rank', 'id'], cursor, page_size, descending=True
+            )
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = [{
+            "type": d.kind,
+            "id": d.object_id,
+            "title": d.title,
+            "body": d.body,
+            "date": d.created_at,
+            "rank": d.rank,
+        } for d in rows]
+        return Response({"results": data, "next_cursor": next_cursor})
+
+
+class NotificationBroadcastAPIView(APIView):
+    """
+    POST {message, role?, course_id?, session_year_id?, subject_id?}: notifies every matching
+    student and/or staff member (role: students, staff or all). Admins can target anything;
+    staff can notify the students of a subject they teach. Large audiences are queued (202).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        user_type = request.user.user_type
+        if user_type not in ['1', '2']:
+            return Response({"detail": "Forbidden"}, status=403)
+
+        message = (request.data.get('message') or '').strip()
+        if not message:
+            return Response({"error": "Message is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        target = {
+            "role": request.data.get('role') or 'all',
+            "course_id": request.data.get('course_id') or None,
+            "session_year_id": request.data.get('session_year_id') or None,
+            "subject_id": request.data.get('subject_id') or None,
+        }
+        if user_type == '2':
+            if not target["subject_id"] or not Subjects.objects.filter(id=target["subject_id"], staff_id=request.user).exists():
+                return Response({"error": "Staff can only notify a subject they teach"}, status=403)
+            target["role"] = 'students'
+        elif not request.data.get('role') and not (target["course_id"] or target["session_year_id"] or target["subject_id"]):
+            # Everyone is only reached with an explicit role
+            return Response({"error": "Choose a role, course, session or subject"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            students, staff = target_recipients(**target)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        recipients = (students.count() if students is not None else 0) + (staff.count() if staff is not None else 0)
+        if recipients > ASYNC_THRESHOLD:
+            transaction.on_commit(lambda: broadcast_notification.delay(message, target))
+            return Response({"message": "Broadcast queued", "recipients": recipients}, status=status.HTTP_202_ACCEPTED)
+
+        created = fan_out(message, students, staff)
+        return Response({"message": "Broadcast sent", "recipients": recipients, **created}, status=status.HTTP_201_CREATED)
+
+
+def _notification_inbox(user):
+    """The requesting user's notifications: students and staff each have their own table."""
+    if user.user_type == '3':
+        return NotificationStudent.objects.filter(student_id__admin_id=user.id)
+    if user.user_type == '2':
+        return NotificationStaffs.objects.filter(stafff_id__admin_id=user.id)
+    return None
+
+
+class NotificationInboxAPIView(APIView):
+    """Student/Staff: own notifications, newest first, in keyset pages on (created_at, id)."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        inbox = _notification_inbox(request.user)
+        if inbox is None:
+            return Response({"results": [], "next_cursor": None, "unread": 0})
+
+        if request.query_params.get('unread') in ('1', 'true'):
+            inbox = inbox.filter(is_read=False)
+        cursor, page_size = page_params(request)
+        try:
+            rows, next_cursor = keyset_page(
+                inbox.values('id', 'message', 'is_read', 'created_at'), ['created_at', 'id'],
+                cursor, page_size, descending=True
+            )
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = [{"id": n['id'], "message": n['message'], "is_read": n['is_read'], "date": n['created_at']} for n in rows]
+        return Response({"results": data, "next_cursor": next_cursor, "unread": unread_count(request.user.id)})
+
+
+class NotificationReadAPIView(APIView):
+    """Student/Staff: POST {ids: [...]} or {all: true} marks notifications as read in one UPDATE."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        inbox = _notification_inbox(request.user)
+        if inbox is None:
+            return Response({"error": "No notification inbox for this user"}, status=403)
+
+        if not request.data.get('all'):
+            ids = request.data.get('ids')
+            if not isinstance(ids, list) or not ids:
+                return Response({"error": "Provide ids or all"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                inbox = inbox.filter(id__in=[int(i) for i in ids])
+            except (TypeError, ValueError):
+                return Response({"error": "ids must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            updated = mark_read(inbox, request.user.id)
+        return Response({"updated": updated, "unread": unread_count(request.user.id)})
+
+
+class NotificationUnreadCountAPIView(APIView):
+    """
+    Unread badge count, polled by the sidebar. The JWT is trusted without loading the user and
+    the count comes from the cached counter, so a poll normally touches no table at all.
+    """
+    authentication_classes = [JWTStatelessUserAuthentication, SessionAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({"unread": unread_count(int(request.user.id))})
+
+
 # --- 5. PUBLIC & LANDING ---
 
 class ContactCreateView(CreateAPIView):
@@ -262,6 +452,7 @@ class StudentLeaveAPIView(APIView):
             {
                 "id": l.id,
                 "leave_date": l.leave_date,
+                "leave_end_date": l.leave_end_date,
                 "leave_message": l.leave_message,
                 "leave_status": l.leave_status,
                 "date": l.created_at
@@ -281,96 +472,221 @@ class StudentLeaveAPIView(APIView):
 
             if not leave_date or not leave_message:
                 return Response({"error": "Missing date or message."}, status=400)
+            try:
+                leave_date, leave_end_date = _leave_period(request.data)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=400)
 
-            LeaveReportStudent.objects.create(
+            leave = LeaveReportStudent.objects.create(
                 student_id=student_profile,
                 leave_date=leave_date,
+                leave_end_date=leave_end_date,
                 leave_message=leave_message,
                 leave_status=0 
             )
+            push([(role_group(CustomUser.HOD), 'leave.created', {"type": "student", "id": leave.id})])
             return Response({"message": "Leave applied successfully"}, status=201)
         except Exception as e:
             return Response({"error": str(e)}, status=400)
         
+LEAVE_STATUSES = {'pending': 0, 'approved': 1, 'rejected': 2}
+
+
+def _admin_leave_page(request, leaves):
+    """
+    Filters leaves by ?status= (0/1/2 or pending/approved/rejected) and keeps those whose
+    period overlaps ?date_from= / ?date_to=, then returns one keyset page, newest first. Raises ValueError on bad input.
+    """
+    status_param = (request.query_params.get('status') or '').lower()
+    if status_param and status_param != 'all':
+        value = LEAVE_STATUSES.get(status_param, status_param)
+        if not str(value).isdigit():
+            raise ValueError("Invalid status")
+        leaves = leaves.filter(leave_status=int(value))
+
+    for param, lookup in (('date_from', 'leave_end_date__gte'), ('date_to', 'leave_date__lte')):
+        raw = request.query_params.get(param)
+        if raw:
+            day = parse_date(raw)
+            if day is None:
+                raise ValueError(f"Invalid {param}")
+            leaves = leaves.filter(**{lookup: day})
+
+    cursor, page_size = page_params(request)
+    return keyset_page(leaves, ['created_at', 'id'], cursor, page_size, descending=True)
+
+
 class AdminStudentLeaveView(APIView):
-    # Change to IsAuthenticated to handle custom role logic
+    """Admin: keyset-paginated student leave queue, filterable by status and leave date range."""
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
+        if request.user.user_type not in ['1']:
+            return Response(
+                {"detail": "Access denied. Admin privileges required."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        leaves = LeaveReportStudent.objects.select_related('student_id__admin')
         try:
-            # 1. Custom Role Check
-            # Assuming '1' is Admin. Adjust based on your actual CustomUser model.
-            if request.user.user_type not in ['1']: 
-                return Response(
-                    {"detail": "Access denied. Admin privileges required."}, 
-                    status=status.HTTP_403_FORBIDDEN
-                )
-
-            # 2. Fetch Data
-            leaves = LeaveReportStudent.objects.select_related('student_id__admin').all().order_by('-created_at')
-            
-            data = []
-            for l in leaves:
-                data.append({
-                    "id": l.id,
-                    "student_name": l.student_id.admin.get_full_name(), 
-                    "leave_date": str(l.leave_date),
-                    "leave_message": l.leave_message,
-                    "leave_status": int(l.leave_status),
-                    "applied_on": l.created_at.strftime("%Y-%m-%d")
-                })
-            
-            return Response(data, status=status.HTTP_200_OK)
-            
-        except Exception as e:
+            rows, next_cursor = _admin_leave_page(request, leaves)
+        except ValueError as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
-        
+
+        data = [{
+            "id": l.id,
+            "student_name": l.student_id.admin.get_full_name(),
+            "leave_date": str(l.leave_date),
+            "leave_end_date": str(l.leave_end_date),
+            "leave_message": l.leave_message,
+            "leave_status": int(l.leave_status),
+            "applied_on": l.created_at.strftime("%Y-%m-%d")
+        } for l in rows]
+        return Response({"results": data, "next_cursor": next_cursor}, status=status.HTTP_200_OK)
+
+
 class AdminStaffLeaveView(APIView):
+    """Admin: keyset-paginated staff leave queue, filterable by status and leave date range."""
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
         if request.user.user_type != '1':
-            return Response({"detail": "Forbidden"}, status=403)   
-        leaves = LeaveReportStaff.objects.select_related('staff_id__admin').all().order_by('-created_at')
-        
-        data = []
-        for l in leaves:
-            data.append({
-                "id": l.id,
-                "staff_name": l.staff_id.admin.get_full_name() if l.staff_id else "Unknown Staff",
-                "leave_date": str(l.leave_date),
-                "leave_message": l.leave_message,
-                "leave_status": int(l.leave_status),
-                "created_at": l.created_at.strftime("%Y-%m-%d")
-            })
-        return Response(data)
+            return Response({"detail": "Forbidden"}, status=403)
+
+        leaves = LeaveReportStaff.objects.select_related('staff_id__admin')
+        try:
+            rows, next_cursor = _admin_leave_page(request, leaves)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+        data = [{
+            "id": l.id,
+            "staff_name": l.staff_id.admin.get_full_name() if l.staff_id else "Unknown Staff",
+            "leave_date": str(l.leave_date),
+            "leave_end_date": str(l.leave_end_date),
+            "leave_message": l.leave_message,
+            "leave_status": int(l.leave_status),
+            "created_at": l.created_at.strftime("%Y-%m-%d")
+        } for l in rows]
+        return Response({"results": data, "next_cursor": next_cursor})
+
+
+@method_decorator(csrf_exempt, name='dispatch')
 class AdminLeaveActionAPIView(APIView):
+    """
+    Admin approves (1) or rejects (2) leaves in bulk:
+    {"student_leave_ids": [...], "staff_leave_ids": [...], "status": 1}.
+    The single-leave form {"leave_id", "type": "student"|"staff", "status"} is still accepted.
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
-        leave_id = request.data.get('leave_id')
-        leave_type = request.data.get('type')  
-        new_status = request.data.get('status') 
+        if request.user.user_type != '1':
+            return Response({"detail": "Forbidden"}, status=403)
 
-        try:
+        new_status = request.data.get('status')
+        new_status = LEAVE_STATUSES.get(str(new_status).lower(), new_status)
+        if str(new_status) not in {str(v) for v in LEAVE_STATUSES.values()}:
+            return Response({"error": "Invalid status"}, status=status.HTTP_400_BAD_REQUEST)
+
+        student_ids = request.data.get('student_leave_ids') or []
+        staff_ids = request.data.get('staff_leave_ids') or []
+        leave_id = request.data.get('leave_id')
+        if leave_id is not None:
+            leave_type = request.data.get('type')
             if leave_type == 'student':
-                leave_record = LeaveReportStudent.objects.get(id=leave_id)
+                student_ids = [leave_id]
             elif leave_type == 'staff':
-                leave_record = LeaveReportStaff.objects.get(id=leave_id)
+                staff_ids = [leave_id]
             else:
                 return Response({"error": "Invalid leave type"}, status=status.HTTP_400_BAD_REQUEST)
 
-            leave_record.leave_status = new_status
-            leave_record.save()
+        if not isinstance(student_ids, list) or not isinstance(staff_ids, list) or not (student_ids or staff_ids):
+            return Response({"error": "Provide student_leave_ids and/or staff_leave_ids"}, status=status.HTTP_400_BAD_REQUEST)
 
-            return Response({"message": "Status updated successfully"}, status=status.HTTP_200_OK)
+        try:
+            result = set_leave_status(student_ids, staff_ids, int(new_status))
+        except (TypeError, ValueError):
+            return Response({"error": "Leave ids must be integers"}, status=status.HTTP_400_BAD_REQUEST)
 
-        except (LeaveReportStudent.DoesNotExist, LeaveReportStaff.DoesNotExist):
+        if leave_id is not None and not (result['student']['updated'] or result['staff']['updated']):
             return Response({"error": "Leave record not found"}, status=status.HTTP_404_NOT_FOUND)
-        except Exception as e:
+        return Response({"message": "Status updated successfully", **result}, status=status.HTTP_200_OK)
+
+
+def _leave_kinds(request):
+    """?type=staff|student narrows to one kind; both by default."""
+    kind = request.query_params.get('type')
+    if not kind:
+        return list(LEAVE_KINDS)
+    if kind not in LEAVE_KINDS:
+        raise ValueError("type must be 'staff' or 'student'")
+    return [kind]
+
+
+class LeaveOverlapAPIView(APIView):
+    """
+    Admin: pending and approved leaves overlapping ?start=..&end= (inclusive; end defaults to
+    start), grouped by kind. Lets an approver see who else is away before approving.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if request.user.user_type != '1':
+            return Response({"detail": "Forbidden"}, status=403)
+
+        try:
+            start, end = _leave_period({
+                'leave_date': request.query_params.get('start'),
+                'leave_end_date': request.query_params.get('end'),
+            })
+            kinds = _leave_kinds(request)
+        except ValueError as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
-        
+
+        data = {"start": str(start), "end": str(end)}
+        for kind in kinds:
+            data[kind] = [{
+                "id": leave['id'],
+                "user_id": leave['user_id'],
+                "name": leave['name'].strip(),
+                "leave_date": str(leave['leave_date']),
+                "leave_end_date": str(leave['leave_end_date']),
+                "leave_message": leave['leave_message'],
+                "leave_status": leave['leave_status'],
+            } for leave in active_leaves(kind, start, end)]
+        return Response(data)
+
+
+class LeaveCalendarAPIView(APIView):
+    """
+    Admin: who is on leave (pending or approved) on each day of ?month=YYYY-MM, defaulting to
+    the current month. ?type= picks staff (the default) or student.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if request.user.user_type != '1':
+            return Response({"detail": "Forbidden"}, status=403)
+
+        kind = request.query_params.get('type') or 'staff'
+        month = request.query_params.get('month') or timezone.localdate().strftime('%Y-%m')
+        if kind not in LEAVE_KINDS:
+            return Response({"error": "type must be 'staff' or 'student'"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            first = parse_date(f"{month}-01")
+        except ValueError:
+            first = None
+        if first is None:
+            return Response({"error": "Invalid month (YYYY-MM)."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "month": first.strftime('%Y-%m'),
+            "type": kind,
+            "days": month_calendar(kind, first.year, first.month),
+        })
+
+
 
 class StudentResultAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -385,7 +701,7 @@ class StudentResultAPIView(APIView):
                 else:
                     subject = Subjects.objects.get(subject_name__iexact=subject_param)
                 
-                students = Students.objects.filter(course_id=subject.course_id)
+                students = Students.objects.filter(course_id=subject.course_id).select_related('admin')
                 
                 data = [{
                     "id": s.id,
@@ -397,7 +713,7 @@ class StudentResultAPIView(APIView):
                 return Response({"error": "Subject not found"}, status=404)
 
         else:
-            results = StudentResult.objects.all()
+            results = StudentResult.objects.select_related('subject_id', 'student_id__admin')
 
             if hasattr(user, 'students'):
                 results = results.filter(student_id=user.students)
@@ -422,12 +738,319 @@ class StudentResultAPIView(APIView):
             else:
                 subj = Subjects.objects.get(subject_name__iexact=subject_id)
 
-            for std_id, marks in marks_list.items():
-                StudentResult.objects.update_or_create(
-                    student_id_id=std_id,
-                    subject_id=subj,
-                    defaults={'subject_exam_marks': float(marks or 0)}
-                )
-            return Response({"message": "Saved"}, status=201)
+            if not isinstance(marks_list, dict) or not marks_list:
+                return Response({"error": "marks_list must map student ids to marks"}, status=400)
+
+            rows = {
+                (int(std_id), subj.id): normalize_marks(marks)
+                for std_id, marks in marks_list.items()
+            }
+            save_subject_marks(rows)
+            return Response({"message": "Saved", "saved": len(rows)}, status=201)
+        except InvalidStudentsError as e:
+            return Response({"error": str(e), "invalid_ids": e.invalid_ids}, status=400)
+        except Subjects.DoesNotExist:
+            return Response({"error": "Subject not found"}, status=404)
         except Exception as e:
-            return Response({"error": str(e)}, status=400)
\ No newline at end of file
+            return Response({"error": str(e)}, status=400)
+
+class MarksImportAPIView(APIView):
+    """
+    Admin/Staff: POST a multipart `file` with columns student (id or email), subject (id or name),
+    exam and assignment. The file is processed as a stream in chunks; valid rows are saved even when
+    others fail, and the response lists the failing lines. Staff can only import their own subjects.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        user_type = request.user.user_type
+        if user_type not in ['1', '2']:
+            return Response({"detail": "Forbidden"}, status=403)
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "Upload a CSV file as 'file'"}, status=400)
+
+        try:
+            report = import_marks_csv(upload, staff_user=request.user if user_type == '2' else None)
+            return Response(report.as_dict(), status=200)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+
+class StudentResultListAPIView(APIView):
+    """
+    Paginated results listing: subject, student and user are joined in one query per page
+    and pages follow an id keyset cursor. Filter with subject_id, course_id or session_year_id.
+    Each row carries its class rank and percentile, computed with window functions over the
+    subject (default) or, with `rank_by=course`, one row per student ranked by course total
+    (staff only for the courses they teach in).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        params = request.query_params
+        user = request.user
+        cursor, page_size = page_params(request)
+
+        try:
+            if params.get('rank_by') == 'course':
+                return self._course_totals(request, cursor, page_size)
+
+            # These filters define the cohort being ranked, so they apply before the window functions
+            results = StudentResult.objects.all()
+            if params.get('subject_id'):
+                results = results.filter(subject_id=params['subject_id'])
+            if params.get('course_id'):
+                results = results.filter(subject_id__course_id=params['course_id'])
+            if params.get('session_year_id'):
+                results = results.filter(student_id__session_year_id=params['session_year_id'])
+
+            # Staff only see their own subjects; whole subjects drop out, so ranks are unaffected
+            if hasattr(user, 'staffs'):
+                results = results.filter(subject_id__staff_id=user)
+            rows = ranked_results(results).values(
+                'id', 'subject_exam_marks', 'subject_assignment_marks', 'rank', 'percentile',
+                subject=F('subject_id'),
+                subject_name=F('subject_id__subject_name'),
+                student=F('student_id'),
+                first_name=F('student_id__admin__first_name'),
+                last_name=F('student_id__admin__last_name'),
+                username=F('student_id__admin__username'),
+            )
+            if hasattr(user, 'students'):
+                # A student's rows are picked out after ranking against the whole class
+                rows = rows.filter(Q(student=user.students.id) | AFTER_RANKING)
+            rows, next_cursor = keyset_page(rows, ['id'], cursor, page_size, after_window=AFTER_RANKING)
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = [{
+            "id": r['id'],
+            "subject_id": r['subject'],
+            "subject_name": r['subject_name'],
+            "student_id": r['student'],
+            "student_name": f"{r['first_name']} {r['last_name']}".strip() or r['username'],
+            "subject_exam_marks": r['subject_exam_marks'],
+            "subject_assignment_marks": r['subject_assignment_marks'],
+            "rank": r['rank'],
+            "percentile": round(r['percentile'] * 100, 2),
+        } for r in rows]
+        return Response({"results": data, "next_cursor": next_cursor})
+
+    def _course_totals(self, request, cursor, page_size):
+        params = request.query_params
+        if not params.get('course_id'):
+            return Response({"error": "rank_by=course needs a course_id"}, status=status.HTTP_400_BAD_REQUEST)
+        # Course totals span every subject, so staff only rank the courses they teach in
+        if request.user.user_type == '2' and not Subjects.objects.filter(
+            course_id=params['course_id'], staff_id=request.user
+        ).exists():
+            return Response({"detail": "You do not teach in this course."}, status=status.HTTP_403_FORBIDDEN)
+
+        students = Students.objects.filter(course_id=params['course_id'])
+        if params.get('session_year_id'):
+            students = students.filter(session_year_id=params['session_year_id'])
+
+        rows = ranked_course_totals(students).values(
+            'id', 'score', 'rank', 'percentile',
+            course=F('course_id'),
+            first_name=F('admin__first_name'),
+            last_name=F('admin__last_name'),
+            username=F('admin__username'),
+        )
+        if hasattr(request.user, 'students'):
+            rows = rows.filter(Q(id=request.user.students.id) | AFTER_RANKING)
+        rows, next_cursor = keyset_page(rows, ['id'], cursor, page_size, after_window=AFTER_RANKING)
+
+        data = [{
+            "course_id": r['course'],
+            "student_id": r['id'],
+            "student_name": f"{r['first_name']} {r['last_name']}".strip() or r['username'],
+            "total": r['score'],
+            "rank": r['rank'],
+            "percentile": round(r['percentile'] * 100, 2),
+        } for r in rows]
+        return Response({"results": data, "next_cursor": next_cursor})
+
+
+class TopResultsAPIView(APIView):
+    """
+    Staff/Admin: top N results per subject (of one subject or every subject in a course), from
+    the same window query. Staff only see the subjects they teach.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if request.user.user_type not in ['1', '2']:
+            return Response({"detail": "Forbidden"}, status=403)
+
+        subject_id = request.query_params.get('subject_id')
+        course_id = request.query_params.get('course_id')
+        try:
+            n = max(1, min(int(request.query_params.get('n', 3)), 100))
+        except ValueError:
+            return Response({"error": "n must be a number"}, status=400)
+        if not (subject_id or course_id) or not str(subject_id or course_id).isdigit():
+            return Response({"error": "Provide a numeric subject_id or course_id"}, status=400)
+
+        results = StudentResult.objects.filter(subject_id=subject_id) if subject_id else StudentResult.objects.filter(subject_id__course_id=course_id)
+        if request.user.user_type == '2':
+            if subject_id and not Subjects.objects.filter(id=subject_id, staff_id=request.user).exists():
+                return Response({"detail": "You do not teach this subject."}, status=403)
+            results = results.filter(subject_id__staff_id=request.user)
+        rows = ranked_results(results).filter(rank__lte=n).values(
+            'rank', 'score', 'percentile',
+            subject=F('subject_id'),
+            subject_name=F('subject_id__subject_name'),
+            student=F('student_id'),
+            first_name=F('student_id__admin__first_name'),
+            last_name=F('student_id__admin__last_name'),
+        ).order_by('subject', 'rank')
+
+        data = {}
+        for r in rows:
+            entry = data.setdefault(r['subject'], {"subject_id": r['subject'], "subject_name": r['subject_name'], "top": []})
+            entry["top"].append({
+                "rank": r['rank'],
+                "student_id": r['student'],
+                "student_name": f"{r['first_name']} {r['last_name']}".strip(),
+                "score": r['score'],
+                "percentile": round(r['percentile'] * 100, 2),
+            })
+        return Response(list(data.values()))
+
+
+class GradebookStatsAPIView(APIView):
+    """Staff/Admin: mean, median, spread, percentiles and histogram of marks for a subject or course."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if request.user.user_type not in ['1', '2']:
+            return Response({"detail": "Forbidden"}, status=403)
+
+        subject_id = request.query_params.get('subject_id')
+        course_id = request.query_params.get('course_id')
+        field = request.query_params.get('field', 'total')
+        try:
+            bucket = float(request.query_params.get('bucket', 10))
+        except ValueError:
+            bucket = 0
+
+        if not (subject_id or course_id) or not str(subject_id or course_id).isdigit():
+            return Response({"error": "Provide a numeric subject_id or course_id"}, status=400)
+        if field not in GRADEBOOK_FIELDS:
+            return Response({"error": f"field must be one of {', '.join(GRADEBOOK_FIELDS)}"}, status=400)
+        # nan and inf parse as floats but cannot size a histogram bucket
+        if not math.isfinite(bucket) or bucket <= 0:
+            return Response({"error": "bucket must be a positive number"}, status=400)
+
+        scope, scope_id = ('subject', subject_id) if subject_id else ('course', course_id)
+        return Response(get_gradebook_stats(scope, int(scope_id), field, bucket))
+
+
+def _can_manage_report_cards(user, course_id):
+    """Admins handle every course's report cards; staff only those of courses they teach in."""
+    if user.user_type == '1':
+        return True
+    return user.user_type == '2' and Subjects.objects.filter(course_id=course_id, staff_id=user).exists()
+
+
+class ReportCardJobAPIView(APIView):
+    """
+    Admin/Staff: POST {course_id, session_year_id?} queues report card generation for a course.
+    If a finished job exists and nothing behind it has changed, that job is returned instead.
+    GET /<job_id>/ reports progress and, once done, the artifact download links.
+    Staff only work with the courses they teach in.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def _serialize(self, job):
+        artifacts = []
+        if job.status == ReportCardJob.DONE:
+            for artifact in job.artifacts:
+                links = {
+                    kind: reverse('api_report_card_artifact', kwargs={"job_id": job.id, "digest": artifact["hash"], "kind": kind})
+                    for kind in ARTIFACT_TYPES
+                }
+                artifacts.append({
+                    "student_id": artifact["student_id"],
+                    "name": artifact["name"],
+                    "hash": artifact["hash"],
+                    **links,
+                })
+        return {
+            "job_id": job.id,
+            "course_id": job.course_id_id,
+            "session_year_id": job.session_year_id_id,
+            "status": job.status,
+            "processed": job.processed,
+            "total": job.total,
+            "error": job.error,
+            "artifacts": artifacts,
+        }
+
+    def get(self, request, job_id):
+        if request.user.user_type not in ['1', '2']:
+            return Response({"detail": "Forbidden"}, status=403)
+        try:
+            job = ReportCardJob.objects.get(id=job_id)
+        except ReportCardJob.DoesNotExist:
+            return Response({"error": "Job not found"}, status=404)
+        if not _can_manage_report_cards(request.user, job.course_id_id):
+            return Response({"detail": "You do not teach in this course."}, status=403)
+        return Response(self._serialize(job))
+
+    def post(self, request):
+        if request.user.user_type not in ['1', '2']:
+            return Response({"detail": "Forbidden"}, status=403)
+
+        course_id = request.data.get('course_id')
+        session_id = request.data.get('session_year_id') or None
+        if not Courses.objects.filter(id=course_id).exists():
+            return Response({"error": "Course not found"}, status=404)
+        if not _can_manage_report_cards(request.user, course_id):
+            return Response({"detail": "You do not teach in this course."}, status=403)
+
+        # Compared against when the job started reading, not when it finished: a change saved
+        # while the job was running may not be in its cards
+        latest = ReportCardJob.objects.filter(
+            course_id=course_id, session_year_id=session_id, status=ReportCardJob.DONE,
+            started_at__isnull=False,
+        ).order_by('-started_at').first()
+        if latest and not changed_since(course_id, session_id, latest.started_at):
+            return Response({**self._serialize(latest), "cached": True}, status=200)
+
+        job = ReportCardJob.objects.create(course_id_id=course_id, session_year_id_id=session_id, requested_by=request.user)
+        transaction.on_commit(lambda: generate_report_cards.delay(job.id))
+        return Response({**self._serialize(job), "cached": False}, status=202)
+
+
+class ReportCardArtifactAPIView(APIView):
+    """
+    Admin/Staff: downloads one artifact (json or html) of a finished report card job.
+    Artifacts live in private storage, so this is the only way to read them.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, job_id, digest, kind):
+        if request.user.user_type not in ['1', '2']:
+            return Response({"detail": "Forbidden"}, status=403)
+        try:
+            job = ReportCardJob.objects.get(id=job_id)
+        except ReportCardJob.DoesNotExist:
+            return Response({"error": "Job not found"}, status=404)
+        if not _can_manage_report_cards(request.user, job.course_id_id):
+            return Response({"detail": "You do not teach in this course."}, status=403)
+
+        # Only the job's own cards: a hash from another course's job is not reachable through this one
+        storage = artifact_storage()
+        name = artifact_name(digest, kind)
+        if (
+            kind not in ARTIFACT_TYPES
+            or job.status != ReportCardJob.DONE
+            or digest not in {artifact["hash"] for artifact in job.artifacts}
+            or not storage.exists(name)
+        ):
+            return Response({"error": "Artifact not found"}, status=404)
+        return FileResponse(storage.open(name, 'rb'), content_type=ARTIFACT_TYPES[kind])
@@ -1,7 +1,10 @@
 import os
+import sys
 from pathlib import Path
 from datetime import timedelta
 
+from celery.schedules import crontab
+
 # --- PATHS ---
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -9,6 +12,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.getenv('DJANGO_SECRET_KEY', 'django-insecure-mq!xdxowx1h#kl^xh6t%nm4*@g3jc4o2@rmok_i=_1p60_l7$-')
 DEBUG = True
 ALLOWED_HOSTS = ['*']
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
 
 # --- APP CONFIGURATION ---
 DJANGO_APPS = [
@@ -21,6 +25,7 @@ DJANGO_APPS = [
 ]
 
 THIRD_PARTY_APPS = [
+    'channels',
     'rest_framework',
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
@@ -110,6 +115,28 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# --- CACHE ---
+# Shared by all workers, so a write in one process invalidates cached counts and stats for all of them
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('CACHE_REDIS_URL', 'redis://redis:6379/1'),
+    }
+}
+
+# --- CHANNELS ---
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels_redis.core.RedisChannelLayer',
+        'CONFIG': {'hosts': [os.getenv('CHANNEL_REDIS_URL', 'redis://redis:6379/2')]},
+    }
+}
+
+# The test runner must not need Redis
+if TESTING:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
 # --- CELERY SETTINGS ---
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_REDIS_URL', 'redis://redis:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('CELERY_BROKER_REDIS_URL', 'redis://redis:6379/0')
@@ -117,6 +144,19 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
+CELERY_BEAT_SCHEDULE = {
+    'notify-low-attendance': {
+        'task': 'app.attendance.tasks.notify_low_attendance',
+        'schedule': crontab(hour=1, minute=0),
+    },
+    'requeue-stale-sync-sheets': {
+        'task': 'app.attendance.tasks.requeue_stale_sync_sheets',
+        'schedule': crontab(minute='*/10'),
+    },
+}
+
+# Students whose attendance in a subject drops below this percentage get notified
+ATTENDANCE_ALERT_THRESHOLD = float(os.getenv('ATTENDANCE_ALERT_THRESHOLD', '75'))
 
 
 STATIC_URL = 'static/'
@@ -126,6 +166,10 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Report card artifacts carry student names, emails, marks and attendance, so they are kept
+# outside MEDIA_ROOT and only served through the authenticated download view
+REPORT_CARD_ROOT = os.getenv('REPORT_CARD_ROOT', os.path.join(BASE_DIR, 'private', 'report_cards'))
+
 # --- CORS & SECURITY ---
 CORS_ALLOW_ALL_ORIGINS = True 
 CORS_ALLOW_CREDENTIALS = True